@@ -1,18 +1,24 @@
 import logging
 from importlib.metadata import version
 from typing import Literal, NamedTuple
+from .async_file_utils import AsyncFileUtils
 from .conf_file_utils import ConfFileUtils
-from .file_utils import FileUtils
+from .file_utils import Codec, DirectoryWatcher, FileUtils, ListingCache, RateLimiter
 from .misc_utils import MiscUtils, Object
 from .os_utils import OsUtils
 
 
 __all__ = (
+    "AsyncFileUtils",
+    "Codec",
     "ConfFileUtils",
+    "DirectoryWatcher",
     "FileUtils",
+    "ListingCache",
     "MiscUtils",
     "Object",
     "OsUtils",
+    "RateLimiter",
 )
 
 __title__ = "ddcUtils"
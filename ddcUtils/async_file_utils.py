@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import itertools
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from ddcUtils import constants
+from ddcUtils.file_utils import FileUtils
+
+
+class AsyncFileUtils:
+    """
+    asyncio facade over FileUtils
+        every public FileUtils static method is available as a coroutine running on a bounded thread pool,
+        and the lazy listings (iter_files, find_older_than, find_duplicates) are async iterators
+        at most max_workers calls run at once, the others wait on the event loop where they can be cancelled;
+        a call already running finishes in its thread and its result is discarded
+    """
+
+    # generator methods exposed as async iterators, iter_zip is left out since its members
+    # are only readable until the next one is yielded, and watch since it never ends a batch
+    _iterators = ("iter_files", "find_older_than", "find_duplicates")
+    _excluded = ("iter_zip", "watch")
+
+    def __init__(self, max_workers: int = constants.ASYNC_MAX_WORKERS, batch_size: int = constants.ASYNC_BATCH_SIZE):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="AsyncFileUtils")
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def __aenter__(self) -> "AsyncFileUtils":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the thread pool, calls not started yet are cancelled
+
+        :return: None
+        """
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the thread pool once a slot is free and returns its result
+
+        :param func:
+        :param args:
+        :param kwargs:
+        :return: the result of func
+        """
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def iterate(self, func: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+        """
+        Lazily yields the items of the iterator returned by func(*args, **kwargs),
+            pulling batch_size items at a time on the thread pool
+            the iterator is closed on the pool when the loop stops early or is cancelled,
+            or right away when that happens after the pool was closed
+
+        :param func:
+        :param args:
+        :param kwargs:
+        :return: AsyncIterator
+        """
+
+        lock = threading.Lock()
+
+        def next_batch(iterator: Iterator) -> list:
+            with lock:
+                return list(itertools.islice(iterator, self.batch_size))
+
+        def close(iterator: Iterator) -> None:
+            # waits for a batch still running after a cancellation
+            with lock:
+                iterator.close()
+
+        iterator = await self.run(func, *args, **kwargs)
+        try:
+            while batch := await self.run(next_batch, iterator):
+                for item in batch:
+                    yield item
+        finally:
+            if hasattr(iterator, "close"):
+                try:
+                    self._executor.submit(close, iterator)
+                except RuntimeError:
+                    # finalized after close(): close it here unless a batch still holds it,
+                    # that batch then finishes on its thread and the iterator is collected with it
+                    if lock.acquire(blocking=False):
+                        try:
+                            iterator.close()
+                        finally:
+                            lock.release()
+
+
+def _coroutine_method(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def method(self: AsyncFileUtils, *args, **kwargs):
+        return await self.run(func, *args, **kwargs)
+
+    return method
+
+
+def _iterator_method(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def method(self: AsyncFileUtils, *args, **kwargs) -> AsyncIterator:
+        async for item in self.iterate(func, *args, **kwargs):
+            yield item
+
+    return method
+
+
+for _name, _attr in vars(FileUtils).items():
+    if _name.startswith("_") or _name in AsyncFileUtils._excluded or not isinstance(_attr, staticmethod):
+        continue
+    _wrap = _iterator_method if _name in AsyncFileUtils._iterators else _coroutine_method
+    setattr(AsyncFileUtils, _name, _wrap(_attr.__func__))
+del _name, _attr, _wrap
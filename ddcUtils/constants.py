@@ -5,3 +5,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATE_TIME_FORMATTER_STR = "%a %b %m %Y %X"
 DATE_FORMATTER = "%Y-%m-%d"
 TIME_FORMATTER = "%H:%M:%S.%f"
+GZIP_COMPRESS_LEVEL = 9
+GZIP_BLOCK_SIZE = 1024 * 1024
+GZIP_CHUNK_SIZE = 256 * 1024
+CHUNK_SIZE = 256 * 1024
+LISTING_CACHE_SIZE = 1024
+# files and directories modified this close to a scan may change again within the same timestamp tick
+RACY_WINDOW_NS = 1_000_000_000
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_POOL_SIZE = 16
+DOWNLOAD_BACKOFF = 0.5
+DOWNLOAD_MAX_BACKOFF = 60.0
+BINARY_HEADER_SIZE = 4096
+HASH_CHUNK_SIZE = 1024 * 1024
+DUPLICATE_BLOCK_SIZE = 64 * 1024
+DUPLICATE_BATCH_SIZE = 4096
+ZIP_COMPRESS_LEVEL = 6
+ZIP_SPOOL_SIZE = 8 * 1024 * 1024
+# already compressed formats that are stored as is by zip_dir
+ZIP_STORE_EXTENSIONS = frozenset(
+    (
+        ".7z .avi .bz2 .docx .gif .gz .jar .jpeg .jpg .mkv .mov .mp3 .mp4 .png .pptx"
+        " .rar .tgz .webp .whl .xlsx .xz .zip .zst"
+    ).split()
+)
+ASYNC_MAX_WORKERS = 16
+ASYNC_BATCH_SIZE = 256
@@ -1,17 +1,507 @@
+import bz2
+import contextlib
 import errno
+import fnmatch
+import glob
 import gzip
+import hashlib
+import io
+import json
+import lzma
 import os
+import random
+import re
 import shutil
 import struct
 import subprocess
 import sys
+import tempfile
+import threading
+import time
 import zipfile
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
+from typing import IO, BinaryIO, Literal, NamedTuple
+from urllib.parse import urlsplit
 from zipfile import ZipFile
 import requests
+from ddcUtils import constants
 from ddcUtils.os_utils import OsUtils
 
+try:
+    # Python 3.14+
+    from compression import zstd
+except ImportError:
+    zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipResult(NamedTuple):
+    input_file: Path
+    output_file: Path | None
+    bytes_in: int
+    bytes_out: int
+    duration: float
+    removed: bool
+    error: Exception | None
+
+
+class ZipMember(NamedTuple):
+    path: Path
+    size: int
+
+
+class DownloadResult(NamedTuple):
+    url: str
+    path: Path
+    size: int
+    duration: float
+    error: Exception | None
+
+
+class CopyDirResult(NamedTuple):
+    copied: int
+    skipped: int
+    bytes_copied: int
+
+
+class RotationResult(NamedTuple):
+    rotated: list[GzipResult]
+    removed_archives: list[Path]
+    bytes_in: int
+    bytes_out: int
+    duration: float
+    throughput: float
+
+
+class HashResult(NamedTuple):
+    path: Path
+    digest: str | None
+    size: int
+    cached: bool
+    error: Exception | None
+
+
+class DuplicateGroup(NamedTuple):
+    size: int
+    digest: str
+    paths: list[Path]
+    errors: dict[str, OSError]
+
+
+class Codec(NamedTuple):
+    """
+    Compression format usable by FileUtils.compress and FileUtils.decompress
+        compress turns one block into a self-contained member, so blocks can be compressed in parallel
+        and concatenated; compressor returns an incremental object with compress() and flush();
+        reader wraps a binary file object and reads every concatenated member back
+    """
+
+    name: str
+    extension: str
+    magic: bytes
+    default_level: int
+    compress: Callable[[bytes, int], bytes]
+    compressor: Callable[[int], object]
+    reader: Callable[[BinaryIO], BinaryIO]
+
+
+class SnapshotEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    inode: int
+    digest: str | None
+
+
+class SnapshotDiff(NamedTuple):
+    added: list[str]
+    removed: list[str]
+    modified: list[str]
+
+
+class WatchEvent(NamedTuple):
+    kind: Literal["created", "modified", "deleted"]
+    path: Path
+
+
+class BinaryInfo(NamedTuple):
+    path: Path
+    format: str | None
+    arch: str | None
+    bits: int | None
+    error: Exception | None
+
+
+class ListingCache:
+    """
+    LRU cache of directory listings keyed by directory path
+        a cached listing is reused while the directory's own mtime and ctime are unchanged,
+        so a repeat listing costs a single stat
+    """
+
+    _racy_window_ns = constants.RACY_WINDOW_NS
+
+    def __init__(self, maxsize: int = constants.LISTING_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._listings: OrderedDict[tuple[str, str], tuple[tuple[int, int], list[os.DirEntry]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def scandir(self, directory: str) -> list[os.DirEntry]:
+        """
+        Returns the entries of the given directory, from the cache when the directory is unchanged
+            the os.DirEntry objects keep their cached stat results across calls
+
+        :param directory:
+        :return: list[os.DirEntry]
+        """
+
+        directory = os.fspath(directory)
+        key = (os.path.abspath(directory), directory)
+        st = os.stat(directory)
+        stamp = (st.st_mtime_ns, st.st_ctime_ns)
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached and cached[0] == stamp:
+                self._listings.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        scan_start = time.time_ns()
+        with os.scandir(directory) as it:
+            entries = list(it)
+
+        with self._lock:
+            if max(stamp) < scan_start - self._racy_window_ns:
+                self._listings[key] = (stamp, entries)
+                self._listings.move_to_end(key)
+                while len(self._listings) > self.maxsize:
+                    self._listings.popitem(last=False)
+            else:
+                self._listings.pop(key, None)
+        return entries
+
+    def clear(self) -> None:
+        """
+        Drop every cached listing
+
+        :return: None
+        """
+
+        with self._lock:
+            self._listings.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class RateLimiter:
+    """
+    Token bucket limiting a byte rate, shareable between concurrent downloads
+        rate is in bytes per second and burst caps the tokens saved up while idle
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}")
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """
+        Take amount tokens, sleeping until the bucket can pay for them
+            the bucket may go into debt for chunks bigger than burst, so callers never deadlock
+
+        :param amount:
+        :return: None
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class DirectoryWatcher:
+    """
+    Polling watcher reporting created, modified and deleted files under a directory, without any inotify binding
+        the last state is kept in memory and each poll stats the known directories first,
+        only directories whose mtime or ctime moved are read again with scandir,
+        and files of unchanged directories get a single stat each when modified is True
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: float = 1.0,
+        recursive: bool = True,
+        pattern: str = "*",
+        prune_dirs: str | Iterable[str] | None = None,
+        modified: bool = True,
+    ):
+        if not os.path.isdir(path):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.recursive = recursive
+        self.pattern = pattern
+        self.prune_dirs = [prune_dirs] if isinstance(prune_dirs, str) else prune_dirs
+        self.modified = modified
+        self._dirs: dict[str, tuple[int, int] | None] = {}
+        self._files: dict[str, dict[str, tuple[int, int, int]]] = {}
+        self._subdirs: dict[str, set[str]] = {}
+        self._stop = threading.Event()
+        self._rescan(self.path, None)
+
+    def __iter__(self) -> Iterator[WatchEvent]:
+        while not self._stop.is_set():
+            yield from self.poll()
+            self._stop.wait(self.interval)
+
+    def _rescan(self, directory: str, events: list[WatchEvent] | None) -> None:
+        """
+        Read directory and every new subdirectory again, appending the file changes to events
+            no events are recorded while events is None, for the initial state
+
+        :param directory:
+        :param events:
+        :return: None
+        """
+
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            scan_start = time.time_ns()
+            try:
+                st = os.stat(current)
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except (FileNotFoundError, NotADirectoryError):
+                self._forget(current, events)
+                continue
+
+            files, subdirs = {}, set()
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and not (
+                            self.prune_dirs and any(fnmatch.fnmatch(entry.name, p) for p in self.prune_dirs)
+                        ):
+                            subdirs.add(entry.name)
+                    elif entry.is_file(follow_symlinks=False) and fnmatch.fnmatch(entry.name, self.pattern):
+                        est = entry.stat(follow_symlinks=False)
+                        files[entry.name] = (est.st_size, est.st_mtime_ns, est.st_ino)
+                except FileNotFoundError:
+                    continue
+
+            old_files = self._files.get(current, {})
+            if events is not None:
+                for name, stamp in files.items():
+                    if name not in old_files:
+                        events.append(WatchEvent("created", Path(current, name)))
+                    elif old_files[name] != stamp:
+                        events.append(WatchEvent("modified", Path(current, name)))
+                for name in old_files.keys() - files.keys():
+                    events.append(WatchEvent("deleted", Path(current, name)))
+            self._files[current] = files
+
+            # directories changed this close to the scan may change again within the same timestamp tick
+            stamp = (st.st_mtime_ns, st.st_ctime_ns)
+            self._dirs[current] = stamp if max(stamp) < scan_start - constants.RACY_WINDOW_NS else None
+
+            old_subdirs = self._subdirs.get(current, set())
+            self._subdirs[current] = subdirs
+            for name in old_subdirs - subdirs:
+                self._forget(os.path.join(current, name), events)
+            pending.extend(os.path.join(current, name) for name in subdirs - old_subdirs)
+
+    def _forget(self, directory: str, events: list[WatchEvent] | None) -> None:
+        """
+        Drop directory and its subdirectories from the state, reporting their files as deleted
+
+        :param directory:
+        :param events:
+        :return: None
+        """
+
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            self._dirs.pop(current, None)
+            for name in self._files.pop(current, {}):
+                if events is not None:
+                    events.append(WatchEvent("deleted", Path(current, name)))
+            pending.extend(os.path.join(current, name) for name in self._subdirs.pop(current, set()))
+
+    def poll(self) -> list[WatchEvent]:
+        """
+        Check the tree once and returns the changes since the previous poll
+
+        :return: list[WatchEvent]
+        """
+
+        events: list[WatchEvent] = []
+        for directory in list(self._dirs):
+            if directory not in self._dirs:
+                # forgotten with a removed parent earlier in this poll
+                continue
+            try:
+                st = os.stat(directory)
+            except FileNotFoundError:
+                if directory == self.path:
+                    self._forget(directory, events)
+                continue
+            if self._dirs[directory] != (st.st_mtime_ns, st.st_ctime_ns):
+                self._rescan(directory, events)
+            elif self.modified:
+                files = self._files[directory]
+                for name, stamp in files.items():
+                    try:
+                        fst = os.stat(os.path.join(directory, name), follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    if (fst.st_size, fst.st_mtime_ns, fst.st_ino) != stamp:
+                        files[name] = (fst.st_size, fst.st_mtime_ns, fst.st_ino)
+                        events.append(WatchEvent("modified", Path(directory, name)))
+        if self.path not in self._dirs and os.path.isdir(self.path):
+            # the watched directory came back
+            self._rescan(self.path, events)
+        return events
+
+    def run(self, callback: Callable[[WatchEvent], object]) -> None:
+        """
+        Call callback with every event, polling every interval seconds until stop is called
+
+        :param callback:
+        :return: None
+        """
+
+        for event in self:
+            callback(event)
+
+    def stop(self) -> None:
+        """
+        Make run and iteration return after the current poll, safe to call from any thread
+
+        :return: None
+        """
+
+        self._stop.set()
+
+
+# machine field of the PE COFF header
+_PE_MACHINES = {
+    0x014C: ("x86", 32),
+    0x0200: ("ia64", 64),
+    0x8664: ("x86_64", 64),
+    0x01C0: ("arm", 32),
+    0x01C4: ("arm", 32),
+    0xAA64: ("arm64", 64),
+}
+# e_machine field of the ELF header, bits come from e_ident[EI_CLASS]
+_ELF_MACHINES = {
+    0x02: "sparc",
+    0x03: "x86",
+    0x08: "mips",
+    0x14: "ppc",
+    0x15: "ppc64",
+    0x16: "s390",
+    0x28: "arm",
+    0x2B: "sparc64",
+    0x32: "ia64",
+    0x3E: "x86_64",
+    0xB7: "arm64",
+    0xF3: "riscv",
+}
+# cputype field of the Mach-O header, CPU_ARCH_ABI64 is 0x01000000
+_MACHO_CPU_TYPES = {
+    0x00000007: ("x86", 32),
+    0x01000007: ("x86_64", 64),
+    0x0000000C: ("arm", 32),
+    0x0100000C: ("arm64", 64),
+    0x0200000C: ("arm64_32", 32),
+    0x00000012: ("ppc", 32),
+    0x01000012: ("ppc64", 64),
+}
+
+# <log name>.<YYYYmmdd-HHMMSS>[-n].gz as written by FileUtils.rotate_logs
+_ROTATED_ARCHIVE = re.compile(r"^(?P<name>.+)\.(?P<stamp>\d{8}-\d{6})(?:-(?P<n>\d+))?\.gz$")
+
+_codecs: dict[str, Codec] = {
+    "gzip": Codec(
+        "gzip",
+        ".gz",
+        b"\x1f\x8b",
+        constants.GZIP_COMPRESS_LEVEL,
+        lambda data, level: gzip.compress(data, level, mtime=0),
+        lambda level: zlib.compressobj(level, zlib.DEFLATED, 31),
+        lambda fileobj: gzip.GzipFile(fileobj=fileobj, mode="rb"),
+    ),
+    "bz2": Codec(
+        "bz2",
+        ".bz2",
+        b"BZh",
+        9,
+        lambda data, level: bz2.compress(data, level),
+        lambda level: bz2.BZ2Compressor(level),
+        lambda fileobj: bz2.BZ2File(fileobj, "rb"),
+    ),
+    "lzma": Codec(
+        "lzma",
+        ".xz",
+        b"\xfd7zXZ\x00",
+        6,
+        lambda data, level: lzma.compress(data, preset=level),
+        lambda level: lzma.LZMACompressor(preset=level),
+        lambda fileobj: lzma.LZMAFile(fileobj, "rb"),
+    ),
+}
+if zstd is not None:
+    _codecs["zstd"] = Codec(
+        "zstd",
+        ".zst",
+        b"\x28\xb5\x2f\xfd",
+        3,
+        lambda data, level: zstd.compress(data, level),
+        lambda level: zstd.ZstdCompressor(level),
+        lambda fileobj: zstd.ZstdFile(fileobj, "rb"),
+    )
+elif zstandard is not None:
+    _codecs["zstd"] = Codec(
+        "zstd",
+        ".zst",
+        b"\x28\xb5\x2f\xfd",
+        3,
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        lambda level: zstandard.ZstdCompressor(level=level).compressobj(),
+        lambda fileobj: zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False),
+    )
+
+_listing_cache = ListingCache()
+_binary_type_cache: dict[str, tuple[tuple[int, int, int], BinaryInfo]] = {}
+_binary_type_lock = threading.Lock()
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
 
 class FileUtils:
     def __init__(self, *args, **kwargs):
@@ -45,63 +535,265 @@ class FileUtils:
             raise e
 
     @staticmethod
-    def list_files(directory: str, starts_with: str | None = None, ends_with: str | None = None) -> tuple:
+    def _scan_entries(
+        directory: str,
+        starts_with: str | None = None,
+        ends_with: str | None = None,
+        recursive: bool = False,
+        prune_dirs: str | Iterable[str] | None = None,
+        cache: ListingCache | None = None,
+    ) -> Iterator[os.DirEntry]:
+        """
+        Lazily yields the os.DirEntry of every entry in the given directory whose name matches
+            starts_with/ends_with (case-insensitive), descending into subdirectories when recursive
+            directories whose name matches a prune_dirs glob are skipped entirely
+            each directory is read through cache when one is given
+
+        :param directory:
+        :param starts_with:
+        :param ends_with:
+        :param recursive:
+        :param prune_dirs:
+        :param cache:
+        :return: Iterator[os.DirEntry]
+        """
+
+        starts_with = starts_with.lower() if starts_with else None
+        ends_with = ends_with.lower() if ends_with else None
+        prune_dirs = [prune_dirs] if isinstance(prune_dirs, str) else prune_dirs
+        pending = [directory]
+        while pending:
+            subdirs = []
+            current = pending.pop()
+            with contextlib.nullcontext(cache.scandir(current)) if cache is not None else os.scandir(current) as it:
+                for entry in it:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and prune_dirs and any(fnmatch.fnmatch(entry.name, p) for p in prune_dirs):
+                        continue
+                    if recursive and is_dir:
+                        subdirs.append(entry.path)
+                    name = entry.name.lower()
+                    if (not starts_with or name.startswith(starts_with)) and (
+                        not ends_with or name.endswith(ends_with)
+                    ):
+                        yield entry
+            # scandir handles are closed before descending, so deep trees never hold many open
+            pending.extend(reversed(subdirs))
+
+    @staticmethod
+    def iter_files(
+        directory: str,
+        starts_with: str | None = None,
+        ends_with: str | None = None,
+        recursive: bool = False,
+        prune_dirs: str | Iterable[str] | None = None,
+        cache: bool | ListingCache = False,
+    ) -> Iterator[Path]:
+        """
+        Lazily yields the Path of every entry in the given directory, unsorted and without any stat call
+            recursive descends into subdirectories, skipping the ones matching a prune_dirs glob
+            cache=True (or a ListingCache) reuses listings of directories that did not change
+
+        :param directory:
+        :param starts_with:
+        :param ends_with:
+        :param recursive:
+        :param prune_dirs:
+        :param cache:
+        :return: Iterator[Path]
+        """
+
+        cache = _listing_cache if cache is True else None if cache is False else cache
+        try:
+            if os.path.isdir(directory):
+                for entry in FileUtils._scan_entries(directory, starts_with, ends_with, recursive, prune_dirs, cache):
+                    yield Path(entry.path)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def list_files(
+        directory: str,
+        starts_with: str | None = None,
+        ends_with: str | None = None,
+        recursive: bool = False,
+        prune_dirs: str | Iterable[str] | None = None,
+        sort_by: Literal["ctime", "mtime", "size", "name"] | None = "ctime",
+        cache: bool | ListingCache = False,
+    ) -> tuple:
         """
         List all files in the given directory and returns them in a list
             sorted by creation time in ascending order
+            sort_by picks ctime, mtime, size, name or None (unsorted, no stat calls),
+            reusing the stat cached on each os.DirEntry so every entry is stat'ed at most once
+            cache=True (or a ListingCache) keeps listings and their stats until the directory's own
+            mtime/ctime changes, so polling an unchanged directory only stats the directory itself;
+            files modified in place without adding, removing or renaming entries keep their cached stats
 
         :param directory:
         :param starts_with:
         :param ends_with:
+        :param recursive:
+        :param prune_dirs:
+        :param sort_by:
+        :param cache:
         :return: tuple
         """
 
+        cache = _listing_cache if cache is True else None if cache is False else cache
         try:
             result = []
             if os.path.isdir(directory):
-                if starts_with and ends_with:
-                    result = [
-                        Path(directory, f)
-                        for f in os.listdir(directory)
-                        if f.lower().startswith(starts_with.lower()) and f.lower().endswith(ends_with.lower())
-                    ]
-                elif starts_with:
-                    result = [
-                        Path(directory, f) for f in os.listdir(directory) if f.lower().startswith(starts_with.lower())
-                    ]
-                elif ends_with:
-                    result = [
-                        Path(directory, f) for f in os.listdir(directory) if f.lower().endswith(ends_with.lower())
-                    ]
-                else:
-                    result = [Path(directory, f) for f in os.listdir(directory)]
-                result.sort(key=lambda p: p.stat().st_ctime)
+                entries = list(FileUtils._scan_entries(directory, starts_with, ends_with, recursive, prune_dirs, cache))
+                match sort_by:
+                    case "ctime":
+                        entries.sort(key=lambda e: e.stat().st_ctime)
+                    case "mtime":
+                        entries.sort(key=lambda e: e.stat().st_mtime)
+                    case "size":
+                        entries.sort(key=lambda e: e.stat().st_size)
+                    case "name":
+                        entries.sort(key=lambda e: e.name)
+                    case None:
+                        pass
+                    case _:
+                        raise ValueError(f"Invalid sort_by: {sort_by}")
+                result = [Path(e.path) for e in entries]
             return tuple(result)
         except OSError as e:
             sys.stderr.write(repr(e))
             raise e
 
     @staticmethod
-    def gzip(input_file_path: str, output_dir: str | None = None) -> Path | None:
+    def _compress_parallel(
+        fin: BinaryIO,
+        fout: BinaryIO,
+        compress_block: Callable[[bytes], bytes],
+        workers: int,
+        block_size: int,
+    ) -> None:
+        """
+        Compress fin into fout as a stream of concatenated members,
+            compressing each block on a thread pool and writing the members in order
+
+        :param fin:
+        :param fout:
+        :param compress_block:
+        :param workers:
+        :param block_size:
+        :return: None
+        """
+
+        written = False
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            while block := fin.read(block_size):
+                pending.append(executor.submit(compress_block, block))
+                # keep memory bounded to a couple of blocks per worker
+                if len(pending) >= workers * 2:
+                    fout.write(pending.popleft().result())
+                    written = True
+            while pending:
+                fout.write(pending.popleft().result())
+                written = True
+        if not written:
+            fout.write(compress_block(b""))
+
+    @staticmethod
+    def _gzip_parallel(
+        fin: BinaryIO,
+        fout: BinaryIO,
+        compresslevel: int,
+        workers: int,
+        block_size: int,
+        mtime: float | None = None,
+    ) -> None:
+        """
+        Compress fin into fout as a multi-member gzip stream,
+            compressing each block on a thread pool and writing the members in order
+
+        :param fin:
+        :param fout:
+        :param compresslevel:
+        :param workers:
+        :param block_size:
+        :param mtime:
+        :return: None
+        """
+
+        compress_block = partial(gzip.compress, compresslevel=compresslevel, mtime=mtime)
+        FileUtils._compress_parallel(fin, fout, compress_block, workers, block_size)
+
+    @staticmethod
+    def _gzip_stream(
+        fin: BinaryIO,
+        fout: BinaryIO,
+        compresslevel: int,
+        workers: int,
+        block_size: int,
+        chunk_size: int,
+        mtime: float | None,
+    ) -> None:
+        """
+        Compress fin into fout reading chunk_size bytes at a time,
+            or block_size bytes per worker when workers > 1
+
+        :param fin:
+        :param fout:
+        :param compresslevel:
+        :param workers:
+        :param block_size:
+        :param chunk_size:
+        :param mtime:
+        :return: None
+        """
+
+        if workers > 1:
+            FileUtils._gzip_parallel(fin, fout, compresslevel, workers, block_size, mtime)
+        else:
+            with gzip.GzipFile(fileobj=fout, mode="wb", compresslevel=compresslevel, mtime=mtime) as gz:
+                shutil.copyfileobj(fin, gz, chunk_size)
+
+    @staticmethod
+    def gzip(
+        input_file_path: str | bytes | BinaryIO,
+        output_dir: str | None = None,
+        compresslevel: int = constants.GZIP_COMPRESS_LEVEL,
+        workers: int | None = 1,
+        block_size: int = constants.GZIP_BLOCK_SIZE,
+        chunk_size: int = constants.GZIP_CHUNK_SIZE,
+        mtime: float | None = None,
+    ) -> Path | bytes | None:
         """
         Compress the given file and returns the Path for success or None if failed
+            workers > 1 (or None for all cores) compresses blocks of block_size bytes in parallel
+            and writes a multi-member gzip stream
+            bytes or a binary file object are compressed in memory and the gzip bytes are returned
 
         :param input_file_path:
         :param output_dir:
-        :return: Path | None:
+        :param compresslevel:
+        :param workers:
+        :param block_size:
+        :param chunk_size:
+        :param mtime:
+        :return: Path | bytes | None:
         """
 
-        if not output_dir:
-            output_dir = os.path.dirname(input_file_path)
+        workers = workers or os.cpu_count() or 1
 
-        input_file_name = os.path.basename(input_file_path)
-        output_filename = f"{os.path.splitext(input_file_name)[0]}.gz"
-        output_file = os.path.join(output_dir, output_filename)
+        if not isinstance(input_file_path, (str, os.PathLike)):
+            fin = io.BytesIO(input_file_path) if isinstance(input_file_path, (bytes, bytearray)) else input_file_path
+            fout = io.BytesIO()
+            FileUtils._gzip_stream(fin, fout, compresslevel, workers, block_size, chunk_size, mtime)
+            return fout.getvalue()
 
+        output_file = FileUtils._gzip_output_file(input_file_path, output_dir)
         try:
             with open(input_file_path, "rb") as fin:
-                with gzip.open(output_file, "wb") as fout:
-                    fout.writelines(fin)
+                with open(output_file, "wb") as fout:
+                    FileUtils._gzip_stream(fin, fout, compresslevel, workers, block_size, chunk_size, mtime)
             return Path(output_file)
         except (OSError, IOError) as e:
             sys.stderr.write(repr(e))
@@ -110,145 +802,1808 @@ class FileUtils:
             raise e
 
     @staticmethod
-    def unzip(file_path: str, out_path: str | None = None) -> ZipFile | None:
+    def _gzip_verify(
+        output_file: str,
+        expected_size: int,
+        chunk_size: int = constants.GZIP_CHUNK_SIZE,
+        source_file: str | None = None,
+    ) -> bool:
         """
-        Unzips the given file.zip and returns ZipFile for success or None if failed
+        Read back the given gzip file and returns True if every member passes its CRC check
+            and the decompressed size matches expected_size
+            with source_file the decompressed bytes must also match its content
 
-        :param file_path:
-        :param out_path:
-        :return: ZipFile | None
+        :param output_file:
+        :param expected_size:
+        :param chunk_size:
+        :param source_file:
+        :return: bool
         """
 
+        size = 0
         try:
-            out_path = out_path or os.path.dirname(file_path)
-            with ZipFile(file_path) as zipf:
-                zipf.extractall(out_path)
-                return zipf
-        except (OSError, zipfile.BadZipFile) as e:
-            sys.stderr.write(repr(e))
-            raise e
+            with gzip.open(output_file, "rb") as fin:
+                with open(source_file, "rb") if source_file else contextlib.nullcontext() as src:
+                    while chunk := fin.read(chunk_size):
+                        size += len(chunk)
+                        if src is not None and src.read(len(chunk)) != chunk:
+                            return False
+        except (OSError, EOFError):
+            return False
+        return size == expected_size
 
     @staticmethod
-    def copy(src_path: str, dst_path: str) -> bool:
+    def _gzip_output_file(input_file_path: str, output_dir: str | None) -> str:
         """
-        Copy a file to another location
+        Returns the path gzip writes input_file_path to: its name with the extension replaced by .gz,
+            in output_dir or next to it
 
-        :param src_path:
-        :param dst_path:
-        :return:
+        :param input_file_path:
+        :param output_dir:
+        :return: str
+        """
+
+        output_filename = f"{os.path.splitext(os.path.basename(input_file_path))[0]}.gz"
+        return os.path.join(output_dir or os.path.dirname(input_file_path), output_filename)
+
+    @staticmethod
+    def _gzip_task(input_file_path: str, output_dir: str | None, compresslevel: int, remove_source: bool) -> GzipResult:
+        """
+        Compress a single file for gzip_many and returns its GzipResult instead of raising
+            the archive is created exclusively, so an existing one is reported as FileExistsError and kept,
+            and on any other failure the archive written by this call is removed
+
+        :param input_file_path:
+        :param output_dir:
+        :param compresslevel:
+        :param remove_source:
+        :return: GzipResult
         """
 
+        start = time.perf_counter()
+        output_file, bytes_in, bytes_out, removed, error = None, 0, 0, False, None
         try:
-            shutil.copy(src_path, dst_path)
-            return True
+            bytes_in = os.path.getsize(input_file_path)
+            archive = FileUtils._gzip_output_file(input_file_path, output_dir)
+            with open(input_file_path, "rb") as fin:
+                with open(archive, "xb") as fout:
+                    output_file = Path(archive)
+                    FileUtils._gzip_stream(
+                        fin, fout, compresslevel, 1, constants.GZIP_BLOCK_SIZE, constants.GZIP_CHUNK_SIZE, None
+                    )
+            bytes_out = os.path.getsize(output_file)
+            if remove_source:
+                if not FileUtils._gzip_verify(archive, bytes_in, source_file=input_file_path):
+                    raise OSError(errno.EIO, "gzip verification failed", archive)
+                os.remove(input_file_path)
+                removed = True
         except OSError as e:
-            sys.stderr.write(repr(e))
-            raise e
+            error = e
+            if output_file is not None and not removed:
+                with contextlib.suppress(OSError):
+                    os.remove(output_file)
+                output_file, bytes_out = None, 0
+        duration = time.perf_counter() - start
+        return GzipResult(Path(input_file_path), output_file, bytes_in, bytes_out, duration, removed, error)
 
     @staticmethod
-    def remove(path: str) -> bool:
+    def gzip_many(
+        input_file_paths: Iterable[str],
+        output_dir: str | None = None,
+        compresslevel: int = constants.GZIP_COMPRESS_LEVEL,
+        workers: int | None = None,
+        remove_source: bool = False,
+    ) -> list[GzipResult]:
         """
-        Remove the given file and returns True if the file was successfully removed
+        Compress the given files on a process pool of at most workers processes
+            and returns one GzipResult per file, in the same order, with bytes in, bytes out and duration
+            remove_source deletes each original only after its archive was read back and verified
+            failures are reported in GzipResult.error instead of stopping the batch
+            files whose archive name collides with an earlier file's, or with an archive already on disk,
+            are not compressed and get a FileExistsError, so no archive is ever overwritten
 
-        :param path:
-        :return: True
+        :param input_file_paths:
+        :param output_dir:
+        :param compresslevel:
+        :param workers:
+        :param remove_source:
+        :return: list[GzipResult]
         """
-        try:
-            if os.path.isfile(path):
-                os.remove(path)
-            elif os.path.exists(path):
-                shutil.rmtree(path)
+
+        input_file_paths = [str(p) for p in input_file_paths]
+        if not input_file_paths:
+            return []
+
+        output_files = [FileUtils._gzip_output_file(p, output_dir) for p in input_file_paths]
+        task = partial(
+            FileUtils._gzip_task, output_dir=output_dir, compresslevel=compresslevel, remove_source=remove_source
+        )
+        return FileUtils._map_unique_outputs(task, input_file_paths, output_files, workers)
+
+    @staticmethod
+    def _map_unique_outputs(
+        task: Callable[[str], GzipResult],
+        input_file_paths: list[str],
+        output_files: list[str],
+        workers: int | None,
+    ) -> list[GzipResult]:
+        """
+        Run task over input_file_paths on a process pool of at most workers processes
+            and returns one GzipResult per file, in the same order
+            a file whose output_file collides with an earlier file's is not handed to task
+            and gets a FileExistsError, so no output is ever written twice
+
+        :param task:
+        :param input_file_paths:
+        :param output_files:
+        :param workers:
+        :return: list[GzipResult]
+        """
+
+        results: list[GzipResult | None] = [None] * len(input_file_paths)
+        targets, pending = {}, []
+        for index, (input_file_path, output_file) in enumerate(zip(input_file_paths, output_files)):
+            target = os.path.normcase(os.path.abspath(output_file))
+            if target in targets:
+                error = FileExistsError(errno.EEXIST, f"output name collides with {targets[target]}", output_file)
+                results[index] = GzipResult(Path(input_file_path), None, 0, 0, 0.0, False, error)
             else:
-                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
-        except OSError as e:
-            sys.stderr.write(repr(e))
-            raise e
-        return True
+                targets[target] = input_file_path
+                pending.append(index)
+
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [input_file_paths[i] for i in pending]
+            for index, result in zip(pending, executor.map(task, paths, chunksize=chunksize)):
+                results[index] = result
+        return results
 
     @staticmethod
-    def rename(from_name: str, to_name: str) -> bool:
+    def gzip_dir(
+        source: str,
+        pattern: str = "*",
+        output_dir: str | None = None,
+        compresslevel: int = constants.GZIP_COMPRESS_LEVEL,
+        workers: int | None = None,
+        remove_source: bool = False,
+    ) -> list[GzipResult]:
         """
-        Rename the given file and returns True if the file was successfully renamed
+        Compress every file in the given directory matching pattern, or every file matching
+            source itself when it is a glob, using gzip_many
+            files already ending in .gz are skipped
 
-        :param from_name:
-        :param to_name:
-        :return: True
+        :param source:
+        :param pattern:
+        :param output_dir:
+        :param compresslevel:
+        :param workers:
+        :param remove_source:
+        :return: list[GzipResult]
         """
 
-        try:
-            if os.path.exists(from_name):
-                os.rename(from_name, to_name)
-            return True
-        except OSError as e:
-            sys.stderr.write(repr(e))
-            raise e
+        if os.path.isdir(source):
+            source = os.path.join(glob.escape(source), pattern)
+        input_file_paths = [p for p in glob.iglob(source) if os.path.isfile(p) and not p.lower().endswith(".gz")]
+        return FileUtils.gzip_many(input_file_paths, output_dir, compresslevel, workers, remove_source)
 
     @staticmethod
-    def copy_dir(src: str, dst: str, symlinks: bool = False, ignore=None) -> bool:
+    def gunzip(
+        input_file_path: str | bytes | BinaryIO,
+        output_dir: str | None = None,
+        chunk_size: int = constants.GZIP_CHUNK_SIZE,
+    ) -> Path | bytes | None:
         """
-        Copy files from src to dst and returns True if the copy was successfull
+        Decompress the given gzip file in chunk_size reads and returns the Path for success or None if failed
+            multi-member streams, like the ones written by gzip with workers > 1, are fully decompressed
+            bytes or a binary file object are decompressed in memory and the raw bytes are returned
+            an existing output file is never overwritten, FileExistsError is raised instead
 
-        :param src:
-        :param dst:
-        :param symlinks:
-        :param ignore:
-        :return: True
+        :param input_file_path:
+        :param output_dir:
+        :param chunk_size:
+        :return: Path | bytes | None
         """
 
+        if not isinstance(input_file_path, (str, os.PathLike)):
+            fin = io.BytesIO(input_file_path) if isinstance(input_file_path, (bytes, bytearray)) else input_file_path
+            fout = io.BytesIO()
+            with gzip.GzipFile(fileobj=fin, mode="rb") as gz:
+                shutil.copyfileobj(gz, fout, chunk_size)
+            return fout.getvalue()
+
+        output_file = FileUtils._gunzip_output_file(input_file_path, output_dir)
+        created = False
         try:
-            shutil.copytree(src, dst, symlinks, ignore, dirs_exist_ok=True)
-        except IOError as e:
+            with gzip.open(input_file_path, "rb") as fin:
+                with open(output_file, "xb") as fout:
+                    created = True
+                    shutil.copyfileobj(fin, fout, chunk_size)
+            return Path(output_file)
+        except (OSError, EOFError) as e:
             sys.stderr.write(repr(e))
+            if created:
+                os.remove(output_file)
             raise e
-        return True
 
     @staticmethod
-    def download_file(remote_file_url: str, local_file_path: str) -> bool:
+    def _gunzip_output_file(input_file_path: str, output_dir: str | None) -> str:
         """
-        Download file from remote url to local
-            and returns True if the download was successfull
+        Returns the path gunzip writes input_file_path to: its name without .gz,
+            or with .out appended when it has no .gz suffix, in output_dir or next to it
 
-        :param remote_file_url:
-        :param local_file_path:
-        :return: True
+        :param input_file_path:
+        :param output_dir:
+        :return: str
+        """
+
+        input_file_name = os.path.basename(input_file_path)
+        name, ext = os.path.splitext(input_file_name)
+        output_filename = name if ext.lower() == ".gz" else f"{input_file_name}.out"
+        return os.path.join(output_dir or os.path.dirname(input_file_path), output_filename)
+
+    @staticmethod
+    def register_codec(codec: Codec) -> None:
+        """
+        Add or replace a compression codec, usable by name in compress and decompress
+
+        :param codec:
+        :return: None
+        """
+
+        _codecs[codec.name] = codec
+
+    @staticmethod
+    def get_codec(name: str) -> Codec:
+        """
+        Returns the registered codec with the given name
+
+        :param name:
+        :return: Codec
         """
 
         try:
-            with requests.get(remote_file_url, stream=True) as req:
-                req.raise_for_status()
-                with open(local_file_path, "wb") as outfile:
-                    for chunk in req.iter_content(chunk_size=8192):
-                        outfile.write(chunk)
-        except requests.RequestException as e:
-            sys.stderr.write(repr(e))
-            raise e
-        return True
+            return _codecs[name]
+        except KeyError:
+            raise ValueError(f"Unknown codec: {name}, available: {', '.join(_codecs)}") from None
 
     @staticmethod
-    def get_exe_binary_type(file_path: str) -> str | None:
+    def list_codecs() -> list[str]:
         """
-        Returns the binary type of the given EXE file
+        Returns the names of the registered codecs, zstd is only there when the interpreter has it
 
-        :param file_path:
-        :return: str | None
+        :return: list[str]
         """
 
-        with open(file_path, "rb") as f:
-            if (_ := f.read(2)) != b"MZ":
-                return "Not an EXE file"
-            f.seek(60)
-            header_offset = struct.unpack("<L", f.read(4))[0]
-            f.seek(header_offset + 4)
-            machine = struct.unpack("<H", f.read(2))[0]
-            match machine:
-                case 332:
-                    # IA32 (32-bit x86)
-                    binary_type = "IA32"
-                case 512:
-                    # IA64 (Itanium)
-                    binary_type = "IA64"
-                case 34404:
-                    # IAMD64 (64-bit x86)
+        return list(_codecs)
+
+    @staticmethod
+    def _compress_stream(
+        fin: BinaryIO,
+        fout: BinaryIO,
+        codec: Codec,
+        compresslevel: int,
+        workers: int,
+        block_size: int,
+        chunk_size: int,
+    ) -> None:
+        """
+        Compress fin into fout with the given codec reading chunk_size bytes at a time,
+            or block_size bytes per worker when workers > 1
+
+        :param fin:
+        :param fout:
+        :param codec:
+        :param compresslevel:
+        :param workers:
+        :param block_size:
+        :param chunk_size:
+        :return: None
+        """
+
+        if workers > 1:
+            FileUtils._compress_parallel(
+                fin, fout, lambda block: codec.compress(block, compresslevel), workers, block_size
+            )
+            return
+        compressor = codec.compressor(compresslevel)
+        while chunk := fin.read(chunk_size):
+            if data := compressor.compress(chunk):
+                fout.write(data)
+        fout.write(compressor.flush())
+
+    @staticmethod
+    def _detect_codec(header: bytes) -> Codec:
+        """
+        Returns the registered codec whose magic number starts header
+
+        :param header:
+        :return: Codec
+        """
+
+        for codec in _codecs.values():
+            if codec.magic and header.startswith(codec.magic):
+                return codec
+        raise ValueError("Unknown compression format")
+
+    @staticmethod
+    def compress(
+        input_file_path: str | bytes | BinaryIO,
+        output_dir: str | None = None,
+        codec: str = "gzip",
+        compresslevel: int | None = None,
+        workers: int | None = 1,
+        block_size: int = constants.GZIP_BLOCK_SIZE,
+        chunk_size: int = constants.GZIP_CHUNK_SIZE,
+    ) -> Path | bytes:
+        """
+        Compress the given file with any registered codec and returns the Path of <file><codec extension>
+            compresslevel defaults to the codec's own default
+            workers > 1 (or None for all cores) compresses blocks of block_size bytes in parallel
+            and writes them as concatenated members, which every codec reads back as one stream
+            bytes or a binary file object are compressed in memory and the compressed bytes are returned
+
+        :param input_file_path:
+        :param output_dir:
+        :param codec:
+        :param compresslevel:
+        :param workers:
+        :param block_size:
+        :param chunk_size:
+        :return: Path | bytes
+        """
+
+        codec = FileUtils.get_codec(codec)
+        compresslevel = codec.default_level if compresslevel is None else compresslevel
+        workers = workers or os.cpu_count() or 1
+
+        if not isinstance(input_file_path, (str, os.PathLike)):
+            fin = io.BytesIO(input_file_path) if isinstance(input_file_path, (bytes, bytearray)) else input_file_path
+            fout = io.BytesIO()
+            FileUtils._compress_stream(fin, fout, codec, compresslevel, workers, block_size, chunk_size)
+            return fout.getvalue()
+
+        output_dir = output_dir or os.path.dirname(input_file_path)
+        output_file = os.path.join(output_dir, f"{os.path.basename(input_file_path)}{codec.extension}")
+        try:
+            with open(input_file_path, "rb") as fin:
+                with open(output_file, "wb") as fout:
+                    FileUtils._compress_stream(fin, fout, codec, compresslevel, workers, block_size, chunk_size)
+            return Path(output_file)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            if os.path.isfile(output_file):
+                os.remove(output_file)
+            raise e
+
+    @staticmethod
+    def decompress(
+        input_file_path: str | bytes | BinaryIO,
+        output_dir: str | None = None,
+        codec: str | None = None,
+        chunk_size: int = constants.GZIP_CHUNK_SIZE,
+    ) -> Path | bytes:
+        """
+        Decompress the given file and returns the Path for success
+            the codec is detected from the file's magic number unless given
+            the codec extension is stripped from the output name, any other name gets .out appended
+            bytes or a binary file object are decompressed in memory and the raw bytes are returned
+
+        :param input_file_path:
+        :param output_dir:
+        :param codec:
+        :param chunk_size:
+        :return: Path | bytes
+        """
+
+        if not isinstance(input_file_path, (str, os.PathLike)):
+            fin = io.BytesIO(input_file_path) if isinstance(input_file_path, (bytes, bytearray)) else input_file_path
+            if codec:
+                found = FileUtils.get_codec(codec)
+            else:
+                start = fin.tell()
+                found = FileUtils._detect_codec(fin.read(8))
+                fin.seek(start)
+            fout = io.BytesIO()
+            with found.reader(fin) as reader:
+                shutil.copyfileobj(reader, fout, chunk_size)
+            return fout.getvalue()
+
+        output_file = None
+        try:
+            with open(input_file_path, "rb") as fin:
+                found = FileUtils.get_codec(codec) if codec else FileUtils._detect_codec(fin.read(8))
+                fin.seek(0)
+                input_file_name = os.path.basename(input_file_path)
+                name, ext = os.path.splitext(input_file_name)
+                output_filename = name if ext.lower() == found.extension else f"{input_file_name}.out"
+                output_file = os.path.join(output_dir or os.path.dirname(input_file_path), output_filename)
+                with found.reader(fin) as reader:
+                    with open(output_file, "wb") as fout:
+                        shutil.copyfileobj(reader, fout, chunk_size)
+            return Path(output_file)
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            sys.stderr.write(repr(e))
+            if output_file and os.path.isfile(output_file):
+                os.remove(output_file)
+            raise e
+
+    @staticmethod
+    def _gunzip_task(input_file_path: str, output_dir: str | None, remove_source: bool) -> GzipResult:
+        """
+        Decompress a single file for gunzip_many and returns its GzipResult instead of raising
+            the member CRCs are checked while decompressing, so the source can be removed right after
+
+        :param input_file_path:
+        :param output_dir:
+        :param remove_source:
+        :return: GzipResult
+        """
+
+        start = time.perf_counter()
+        output_file, bytes_in, bytes_out, removed, error = None, 0, 0, False, None
+        try:
+            bytes_in = os.path.getsize(input_file_path)
+            output_file = FileUtils.gunzip(input_file_path, output_dir)
+            bytes_out = os.path.getsize(output_file)
+            if remove_source:
+                os.remove(input_file_path)
+                removed = True
+        except (OSError, EOFError) as e:
+            error = e
+        duration = time.perf_counter() - start
+        return GzipResult(Path(input_file_path), output_file, bytes_in, bytes_out, duration, removed, error)
+
+    @staticmethod
+    def gunzip_many(
+        input_file_paths: Iterable[str],
+        output_dir: str | None = None,
+        workers: int | None = None,
+        remove_source: bool = False,
+    ) -> list[GzipResult]:
+        """
+        Decompress the given gzip files on a process pool of at most workers processes
+            and returns one GzipResult per file, in the same order
+            failures are reported in GzipResult.error instead of stopping the batch
+            files whose output name collides with an earlier file's, or with a file already on disk,
+            are not decompressed and get a FileExistsError, their source is kept
+
+        :param input_file_paths:
+        :param output_dir:
+        :param workers:
+        :param remove_source:
+        :return: list[GzipResult]
+        """
+
+        input_file_paths = [str(p) for p in input_file_paths]
+        if not input_file_paths:
+            return []
+        output_files = [FileUtils._gunzip_output_file(p, output_dir) for p in input_file_paths]
+        task = partial(FileUtils._gunzip_task, output_dir=output_dir, remove_source=remove_source)
+        return FileUtils._map_unique_outputs(task, input_file_paths, output_files, workers)
+
+    @staticmethod
+    def _rotate_task(input_file_path: str, output_file: str, compresslevel: int) -> GzipResult:
+        """
+        Compress a single log for rotate_logs into output_file, never overwriting an existing archive,
+            and remove the log only when the archive verifies and the log did not change meanwhile
+            on any failure the log is kept and the archive written by this call is removed
+
+        :param input_file_path:
+        :param output_file:
+        :param compresslevel:
+        :return: GzipResult
+        """
+
+        start = time.perf_counter()
+        archive, bytes_in, bytes_out, removed, error = None, 0, 0, False, None
+        try:
+            st = os.stat(input_file_path)
+            bytes_in = st.st_size
+            with open(input_file_path, "rb") as fin:
+                with open(output_file, "xb") as fout:
+                    archive = Path(output_file)
+                    FileUtils._gzip_stream(
+                        fin,
+                        fout,
+                        compresslevel,
+                        1,
+                        constants.GZIP_BLOCK_SIZE,
+                        constants.GZIP_CHUNK_SIZE,
+                        st.st_mtime,
+                    )
+            bytes_out = os.path.getsize(output_file)
+            if not FileUtils._gzip_verify(output_file, bytes_in, source_file=input_file_path):
+                raise OSError(errno.EIO, "gzip verification failed", output_file)
+            after = os.stat(input_file_path)
+            if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                raise OSError(errno.EBUSY, "log changed while compressing", input_file_path)
+            os.remove(input_file_path)
+            removed = True
+        except OSError as e:
+            error = e
+            if archive is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(archive)
+                archive, bytes_out = None, 0
+        duration = time.perf_counter() - start
+        return GzipResult(Path(input_file_path), archive, bytes_in, bytes_out, duration, removed, error)
+
+    @staticmethod
+    def rotate_logs(
+        directory: str,
+        pattern: str = "*.log",
+        max_age_days: int | None = None,
+        max_size: int | None = None,
+        keep: int | None = None,
+        keep_archives: int | None = None,
+        output_dir: str | None = None,
+        compresslevel: int = constants.GZIP_COMPRESS_LEVEL,
+        workers: int | None = None,
+    ) -> RotationResult:
+        """
+        Rotate the logs in the given directory matching pattern with a single scandir pass
+            a log is rotated when it is older than max_age_days, at least max_size bytes,
+            or beyond the keep newest logs; with none of these set every matching log is rotated
+            logs are compressed on a process pool into <name>.<mtime>.gz in output_dir (or next to them)
+            and each log is removed only after its archive is read back and verified
+            keep_archives then deletes the oldest archives of each log beyond that count
+            returns a RotationResult with one GzipResult per rotated log and the overall throughput in bytes/s
+
+        :param directory:
+        :param pattern:
+        :param max_age_days:
+        :param max_size:
+        :param keep:
+        :param keep_archives:
+        :param output_dir:
+        :param compresslevel:
+        :param workers:
+        :return: RotationResult
+        """
+
+        start = time.perf_counter()
+        output_dir = output_dir or directory
+        same_dir = os.path.abspath(output_dir) == os.path.abspath(directory)
+        cutoff_timestamp = None
+        if max_age_days is not None:
+            with contextlib.suppress(OSError, ValueError, OverflowError):
+                cutoff_timestamp = (datetime.now() - timedelta(days=int(max_age_days))).timestamp()
+
+        logs: list[tuple[os.DirEntry, os.stat_result]] = []
+        archives: dict[str, list[tuple[tuple[str, int], str]]] = {}
+
+        def add_archive(entry_name: str, entry_path: str) -> None:
+            match = _ROTATED_ARCHIVE.match(entry_name)
+            if match and fnmatch.fnmatch(match["name"], pattern):
+                key = (match["stamp"], int(match["n"] or 0))
+                archives.setdefault(match["name"], []).append((key, entry_path))
+
+        for entry in FileUtils._scan_entries(directory):
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.name.lower().endswith(".gz"):
+                if same_dir:
+                    add_archive(entry.name, entry.path)
+            elif fnmatch.fnmatch(entry.name, pattern):
+                logs.append((entry, entry.stat(follow_symlinks=False)))
+        if keep_archives is not None and not same_dir and os.path.isdir(output_dir):
+            for entry in FileUtils._scan_entries(output_dir):
+                if entry.is_file(follow_symlinks=False):
+                    add_archive(entry.name, entry.path)
+
+        logs.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+        rotate_all = max_age_days is None and max_size is None and keep is None
+        candidates = [
+            (entry.path, st)
+            for i, (entry, st) in enumerate(logs)
+            if rotate_all
+            or (cutoff_timestamp is not None and st.st_mtime < cutoff_timestamp)
+            or (max_size is not None and st.st_size >= max_size)
+            or (keep is not None and i >= keep)
+        ]
+
+        output_files = []
+        taken = {path for entries in archives.values() for _, path in entries}
+        if candidates:
+            os.makedirs(output_dir, exist_ok=True)
+        for path, st in candidates:
+            stamp = datetime.fromtimestamp(st.st_mtime).strftime("%Y%m%d-%H%M%S")
+            output_file = os.path.join(output_dir, f"{os.path.basename(path)}.{stamp}.gz")
+            n = 0
+            while output_file in taken or os.path.exists(output_file):
+                n += 1
+                output_file = os.path.join(output_dir, f"{os.path.basename(path)}.{stamp}-{n}.gz")
+            taken.add(output_file)
+            output_files.append(output_file)
+
+        rotated = []
+        if candidates:
+            workers = min(workers or os.cpu_count() or 1, len(candidates))
+            task = partial(FileUtils._rotate_task, compresslevel=compresslevel)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rotated = list(executor.map(task, [path for path, _ in candidates], output_files))
+
+        removed_archives = []
+        if keep_archives is not None:
+            for result in rotated:
+                if result.output_file is not None:
+                    add_archive(result.output_file.name, str(result.output_file))
+            for entries in archives.values():
+                entries.sort(reverse=True)
+                for _, path in entries[keep_archives:]:
+                    try:
+                        os.remove(path)
+                        removed_archives.append(Path(path))
+                    except OSError as e:
+                        sys.stderr.write(repr(e))
+
+        duration = time.perf_counter() - start
+        bytes_in = sum(r.bytes_in for r in rotated if r.removed)
+        bytes_out = sum(r.bytes_out for r in rotated if r.removed)
+        throughput = bytes_in / duration if duration > 0 else 0.0
+        return RotationResult(rotated, removed_archives, bytes_in, bytes_out, duration, throughput)
+
+    @staticmethod
+    def _zip_member_matches(
+        name: str, include: str | Iterable[str] | None, exclude: str | Iterable[str] | None
+    ) -> bool:
+        """
+        Returns True if the member name matches any include glob (or include is empty)
+            and none of the exclude globs
+
+        :param name:
+        :param include:
+        :param exclude:
+        :return: bool
+        """
+
+        include = [include] if isinstance(include, str) else include
+        exclude = [exclude] if isinstance(exclude, str) else exclude
+        if include and not any(fnmatch.fnmatch(name, p) for p in include):
+            return False
+        return not (exclude and any(fnmatch.fnmatch(name, p) for p in exclude))
+
+    @staticmethod
+    def _zip_member_target(name: str, out_path: str) -> str:
+        """
+        Returns the sanitized extraction path of the given member name inside out_path,
+            dropping drive letters, absolute roots and "." / ".." parts the same way ZipFile.extract does
+
+        :param name:
+        :param out_path:
+        :return: str
+        """
+
+        arcname = name.replace("/", os.path.sep)
+        if os.path.altsep:
+            arcname = arcname.replace(os.path.altsep, os.path.sep)
+        arcname = os.path.splitdrive(arcname)[1]
+        parts = [x for x in arcname.split(os.path.sep) if x not in ("", os.path.curdir, os.path.pardir)]
+        if OsUtils.is_windows():
+            table = str.maketrans(':<>|"?*', "_______")
+            parts = [x.translate(table).rstrip(".") or "_" for x in parts]
+        return os.path.normpath(os.path.join(out_path, *parts))
+
+    @staticmethod
+    def _zip_compress_member(file_path: str, deflate: bool, compresslevel: int) -> tuple[int, int, int, IO[bytes]]:
+        """
+        Compress a single file for zip_dir into a spooled temporary file
+            and returns (crc, file_size, compress_size, spool) with the spool rewound
+
+        :param file_path:
+        :param deflate:
+        :param compresslevel:
+        :return: tuple[int, int, int, IO[bytes]]
+        """
+
+        spool = tempfile.SpooledTemporaryFile(max_size=constants.ZIP_SPOOL_SIZE)
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15) if deflate else None
+        crc, file_size = 0, 0
+        try:
+            with open(file_path, "rb") as fin:
+                while chunk := fin.read(constants.CHUNK_SIZE):
+                    crc = zlib.crc32(chunk, crc)
+                    file_size += len(chunk)
+                    spool.write(compressor.compress(chunk) if compressor else chunk)
+            if compressor:
+                spool.write(compressor.flush())
+            compress_size = spool.tell()
+            spool.seek(0)
+        except BaseException:
+            spool.close()
+            raise
+        return crc, file_size, compress_size, spool
+
+    @staticmethod
+    def _zip_dos_time(timestamp: float) -> tuple[int, int]:
+        """
+        Returns the (time, date) MS-DOS fields of the given timestamp, clamped to 1980-2107
+
+        :param timestamp:
+        :return: tuple[int, int]
+        """
+
+        dt = datetime.fromtimestamp(timestamp)
+        if dt.year < 1980:
+            dt = datetime(1980, 1, 1)
+        elif dt.year > 2107:
+            dt = datetime(2107, 12, 31, 23, 59, 58)
+        return dt.hour << 11 | dt.minute << 5 | dt.second // 2, (dt.year - 1980) << 9 | dt.month << 5 | dt.day
+
+    @staticmethod
+    def zip_dir(
+        source_dir: str,
+        output_file: str | None = None,
+        compresslevel: int = constants.ZIP_COMPRESS_LEVEL,
+        workers: int | None = None,
+        store_extensions: Iterable[str] = constants.ZIP_STORE_EXTENSIONS,
+    ) -> Path:
+        """
+        Create a zip archive of the given directory and returns its Path
+            members are deflated on a pool of workers threads (zlib releases the GIL)
+            and written into the archive sequentially in directory order
+            files whose extension is in store_extensions are stored without compressing them again
+            ZIP64 records are written when members, offsets or the member count exceed the zip limits
+            output_file defaults to <source_dir>.zip
+
+        :param source_dir:
+        :param output_file:
+        :param compresslevel:
+        :param workers:
+        :param store_extensions:
+        :return: Path
+        """
+
+        source_dir = os.path.abspath(source_dir)
+        output_file = os.path.abspath(output_file or f"{source_dir}.zip")
+        store_extensions = {e.lower() for e in store_extensions}
+        create_system = 0 if sys.platform == "win32" else 3
+        workers = workers or os.cpu_count() or 1
+        central_directory = []
+
+        def write_member(fout: BinaryIO, name: str, st: os.stat_result, compressed: tuple | None) -> None:
+            crc, file_size, compress_size, spool = compressed or (0, 0, 0, None)
+            method = zipfile.ZIP_DEFLATED if name in deflated else zipfile.ZIP_STORED
+            offset = fout.tell()
+            encoded = name.encode("utf-8")
+            flags = 0 if encoded.isascii() else 0x800
+            dos_time, dos_date = FileUtils._zip_dos_time(st.st_mtime)
+            zip64 = file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT
+            version = 45 if zip64 else 20
+            extra = struct.pack("<HHQQ", 1, 16, file_size, compress_size) if zip64 else b""
+            sizes = (0xFFFFFFFF, 0xFFFFFFFF) if zip64 else (compress_size, file_size)
+            fout.write(
+                struct.pack(
+                    "<IHHHHHIIIHH",
+                    0x04034B50,
+                    version,
+                    flags,
+                    method,
+                    dos_time,
+                    dos_date,
+                    crc,
+                    *sizes,
+                    len(encoded),
+                    len(extra),
+                )
+            )
+            fout.write(encoded)
+            fout.write(extra)
+            if spool:
+                with spool:
+                    shutil.copyfileobj(spool, fout, constants.CHUNK_SIZE)
+            external_attr = (st.st_mode & 0xFFFF) << 16 | (0x10 if name.endswith("/") else 0)
+            central_directory.append(
+                (encoded, flags, method, dos_time, dos_date, crc, compress_size, file_size, offset, external_attr)
+            )
+
+        def write_central_directory(fout: BinaryIO) -> None:
+            start = fout.tell()
+            for (
+                encoded,
+                flags,
+                method,
+                dos_time,
+                dos_date,
+                crc,
+                compress_size,
+                file_size,
+                offset,
+                attr,
+            ) in central_directory:
+                zip64_fields = []
+                if file_size > zipfile.ZIP64_LIMIT:
+                    zip64_fields.append(file_size)
+                    file_size = 0xFFFFFFFF
+                if compress_size > zipfile.ZIP64_LIMIT:
+                    zip64_fields.append(compress_size)
+                    compress_size = 0xFFFFFFFF
+                if offset > zipfile.ZIP64_LIMIT:
+                    zip64_fields.append(offset)
+                    offset = 0xFFFFFFFF
+                extra = b""
+                if zip64_fields:
+                    extra = struct.pack(f"<HH{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields)
+                version = 45 if zip64_fields else 20
+                fout.write(
+                    struct.pack(
+                        "<IHHHHHHIIIHHHHHII",
+                        0x02014B50,
+                        create_system << 8 | version,
+                        version,
+                        flags,
+                        method,
+                        dos_time,
+                        dos_date,
+                        crc,
+                        compress_size,
+                        file_size,
+                        len(encoded),
+                        len(extra),
+                        0,
+                        0,
+                        0,
+                        attr,
+                        offset,
+                    )
+                )
+                fout.write(encoded)
+                fout.write(extra)
+            end = fout.tell()
+            count, size = len(central_directory), end - start
+            if count > zipfile.ZIP_FILECOUNT_LIMIT or start > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT:
+                fout.write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, size, start))
+                fout.write(struct.pack("<IIQI", 0x07064B50, 0, end, 1))
+                count, size, start = min(count, 0xFFFF), min(size, 0xFFFFFFFF), min(start, 0xFFFFFFFF)
+            fout.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, size, start, 0))
+
+        deflated: set[str] = set()
+        try:
+            with open(output_file, "wb") as fout:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    pending: deque[tuple[str, os.stat_result, Future | None]] = deque()
+                    for entry in FileUtils._scan_entries(source_dir, recursive=True):
+                        if entry.path == output_file:
+                            continue
+                        name = os.path.relpath(entry.path, source_dir).replace(os.sep, "/")
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append((f"{name}/", entry.stat(follow_symlinks=False), None))
+                        elif entry.is_file():
+                            st = entry.stat()
+                            deflate = bool(st.st_size) and os.path.splitext(name)[1].lower() not in store_extensions
+                            if deflate:
+                                deflated.add(name)
+                            future = executor.submit(FileUtils._zip_compress_member, entry.path, deflate, compresslevel)
+                            pending.append((name, st, future))
+                        # keep a bounded number of members in flight, each one holds a spool
+                        while len(pending) > workers * 2:
+                            name, st, future = pending.popleft()
+                            write_member(fout, name, st, future.result() if future else None)
+                    while pending:
+                        name, st, future = pending.popleft()
+                        write_member(fout, name, st, future.result() if future else None)
+                write_central_directory(fout)
+            return Path(output_file)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            if os.path.isfile(output_file):
+                os.remove(output_file)
+            raise e
+
+    @staticmethod
+    def unzip(
+        file_path: str,
+        out_path: str | None = None,
+        include: str | Iterable[str] | None = None,
+        exclude: str | Iterable[str] | None = None,
+        workers: int | None = 1,
+    ) -> list[ZipMember]:
+        """
+        Unzips the given file.zip and returns the manifest of extracted files with their sizes
+            include/exclude are glob patterns matched against member names, so only the needed members are read
+            workers > 1 (or None for all cores) extracts on a thread pool where each worker opens its own handle
+
+        :param file_path:
+        :param out_path:
+        :param include:
+        :param exclude:
+        :param workers:
+        :return: list[ZipMember]
+        """
+
+        try:
+            out_path = out_path or os.path.dirname(file_path)
+            with ZipFile(file_path) as zipf:
+                members = [m for m in zipf.infolist() if FileUtils._zip_member_matches(m.filename, include, exclude)]
+
+            # create every directory up front so workers never race on makedirs
+            targets = []
+            for member in members:
+                target = FileUtils._zip_member_target(member.filename, out_path)
+                if member.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    targets.append((member, target))
+            # reading in archive order keeps each handle's reads mostly sequential
+            targets.sort(key=lambda t: t[0].header_offset)
+
+            local = threading.local()
+            handles = []
+
+            def extract(item: tuple[zipfile.ZipInfo, str]) -> ZipMember:
+                if (zipf := getattr(local, "zipf", None)) is None:
+                    zipf = local.zipf = ZipFile(file_path)
+                    handles.append(zipf)
+                member, target = item
+                with zipf.open(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, constants.CHUNK_SIZE)
+                return ZipMember(Path(target), member.file_size)
+
+            workers = min(workers or os.cpu_count() or 1, max(len(targets), 1))
+            try:
+                if workers > 1:
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        return list(executor.map(extract, targets))
+                return [extract(item) for item in targets]
+            finally:
+                for zipf in handles:
+                    zipf.close()
+        except (OSError, zipfile.BadZipFile) as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def iter_zip(
+        file_path: str,
+        include: str | Iterable[str] | None = None,
+        exclude: str | Iterable[str] | None = None,
+    ) -> Iterator[tuple[zipfile.ZipInfo, IO[bytes]]]:
+        """
+        Reads the central directory of the given file.zip once and lazily yields (ZipInfo, stream)
+            for every file member matching the include/exclude glob patterns, without extracting to disk
+            each stream is closed as soon as the next member is requested
+
+        :param file_path:
+        :param include:
+        :param exclude:
+        :return: Iterator[tuple[zipfile.ZipInfo, IO[bytes]]]
+        """
+
+        try:
+            zipf = ZipFile(file_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+        with zipf:
+            for member in zipf.infolist():
+                if member.is_dir() or not FileUtils._zip_member_matches(member.filename, include, exclude):
+                    continue
+                with zipf.open(member) as stream:
+                    yield member, stream
+
+    @staticmethod
+    def _copy_file_fast(
+        src_path: str,
+        dst_path: str,
+        progress: Callable[[int, int], None] | None = None,
+        chunk_size: int = constants.COPY_CHUNK_SIZE,
+    ) -> str:
+        """
+        Copy the contents of src_path into dst_path and returns the method that finished the copy
+            tries a reflink clone (FICLONE) first, then in-kernel os.copy_file_range,
+            and falls back to shutil.copyfile (sendfile / fcopyfile) when they fail before the first byte;
+            a partial in-kernel copy the kernel gives up on is finished with a userspace loop
+            progress is called with (bytes copied, total bytes) after every chunk,
+            and once at the end when shutil.copyfile did the copy
+
+        :param src_path:
+        :param dst_path:
+        :param progress:
+        :param chunk_size:
+        :return: str
+        """
+
+        # errors meaning "not supported here", anything else after a partial copy is a real failure
+        unsupported = (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP)
+
+        with open(src_path, "rb", buffering=0) as fsrc, open(dst_path, "wb", buffering=0) as fdst:
+            infd, outfd = fsrc.fileno(), fdst.fileno()
+            total = os.fstat(infd).st_size
+            copied = 0
+
+            if sys.platform.startswith("linux"):
+                import fcntl
+
+                try:
+                    fcntl.ioctl(outfd, getattr(fcntl, "FICLONE", 0x40049409), infd)
+                    if progress:
+                        progress(total, total)
+                    return "reflink"
+                except OSError:
+                    pass
+
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while sent := os.copy_file_range(infd, outfd, chunk_size):
+                        copied += sent
+                        if progress:
+                            progress(copied, total)
+                    return "copy_file_range"
+                except OSError as e:
+                    # like shutil, an error before the first byte only means the fast path is unusable here
+                    if copied and e.errno not in unsupported:
+                        raise
+
+            if copied:
+                # both offsets are left after the partial copy, so the loop resumes it
+                buffer = bytearray(min(chunk_size, max(total, 1)))
+                view = memoryview(buffer)
+                while size := fsrc.readinto(buffer):
+                    fdst.write(view[:size])
+                    copied += size
+                    if progress:
+                        progress(copied, total)
+                return "userspace"
+
+        shutil.copyfile(src_path, dst_path)
+        if progress:
+            progress(total, total)
+        return "copyfile"
+
+    @staticmethod
+    def copy(
+        src_path: str,
+        dst_path: str,
+        progress: Callable[[int, int], None] | None = None,
+        chunk_size: int = constants.COPY_CHUNK_SIZE,
+    ) -> bool:
+        """
+        Copy a file to another location
+            the data is cloned (reflink) or copied in-kernel (copy_file_range) when supported,
+            otherwise with shutil.copyfile, which still uses sendfile or fcopyfile where available
+            progress is called with (bytes copied, total bytes) as the copy advances
+
+        :param src_path:
+        :param dst_path:
+        :param progress:
+        :param chunk_size:
+        :return:
+        """
+
+        try:
+            if os.path.isdir(dst_path):
+                dst_path = os.path.join(dst_path, os.path.basename(src_path))
+            if os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):
+                raise shutil.SameFileError(f"{src_path!r} and {dst_path!r} are the same file")
+            FileUtils._copy_file_fast(src_path, dst_path, progress, chunk_size)
+            shutil.copymode(src_path, dst_path)
+            return True
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def _rmtree_parallel(path: str, workers: int) -> None:
+        """
+        Remove the directory tree at path, each directory being scanned and having its files unlinked
+            as one task on a thread pool, subdirectories submitted as soon as their parent is scanned,
+            and then removing the directories deepest level first, each level in parallel
+
+        :param path:
+        :param workers:
+        :return: None
+        """
+
+        def clear_dir(directory: str) -> list[str]:
+            file_paths, subdirs = [], []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        file_paths.append(entry.path)
+            for file_path in file_paths:
+                os.unlink(file_path)
+            return subdirs
+
+        levels: dict[int, list[str]] = {0: [path]}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(clear_dir, path): 0}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth = pending.pop(future) + 1
+                    for subdir in future.result():
+                        levels.setdefault(depth, []).append(subdir)
+                        pending[executor.submit(clear_dir, subdir)] = depth
+            for depth in sorted(levels, reverse=True):
+                list(executor.map(os.rmdir, levels[depth]))
+
+    @staticmethod
+    def remove(path: str, workers: int | None = 1) -> bool:
+        """
+        Remove the given file and returns True if the file was successfully removed
+            directories are removed with workers threads (None for all cores) when workers > 1
+
+        :param path:
+        :param workers:
+        :return: True
+        """
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+            elif os.path.exists(path):
+                workers = workers or os.cpu_count() or 1
+                if workers > 1 and not os.path.islink(path):
+                    FileUtils._rmtree_parallel(path, workers)
+                else:
+                    shutil.rmtree(path)
+            else:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+        return True
+
+    @staticmethod
+    def remove_many(paths: Iterable[str], workers: int | None = 1) -> dict[str, OSError]:
+        """
+        Remove every given file or directory on a pool of workers threads (None for all cores)
+            and returns the errors by path, empty when everything was removed
+            a failing path never stops the others
+
+        :param paths:
+        :param workers:
+        :return: dict[str, OSError]
+        """
+
+        def remove_one(path: str) -> OSError | None:
+            try:
+                FileUtils.remove(path)
+            except OSError as e:
+                return e
+            return None
+
+        paths = [str(p) for p in paths]
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(remove_one, paths)
+            return {path: error for path, error in zip(paths, results) if error is not None}
+
+    @staticmethod
+    def rename(from_name: str, to_name: str) -> bool:
+        """
+        Rename the given file and returns True if the file was successfully renamed
+
+        :param from_name:
+        :param to_name:
+        :return: True
+        """
+
+        try:
+            if os.path.exists(from_name):
+                os.rename(from_name, to_name)
+            return True
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def _copy_dir_task(src_path: str, dst_path: str, compare: str) -> tuple[int | None, OSError | None]:
+        """
+        Copy a single file for copy_dir unless dst_path already matches it
+            and returns (bytes copied or None if skipped, error)
+            files match when sizes are equal and either mtimes (to the second) or, with compare="hash", contents match
+
+        :param src_path:
+        :param dst_path:
+        :param compare:
+        :return: tuple[int | None, OSError | None]
+        """
+
+        try:
+            src_stat = os.stat(src_path)
+            try:
+                dst_stat = os.stat(dst_path)
+            except FileNotFoundError:
+                dst_stat = None
+            if dst_stat is not None and dst_stat.st_size == src_stat.st_size:
+                if compare == "hash":
+                    with open(src_path, "rb") as fsrc, open(dst_path, "rb") as fdst:
+                        if hashlib.file_digest(fsrc, "sha256").digest() == hashlib.file_digest(fdst, "sha256").digest():
+                            return None, None
+                elif int(dst_stat.st_mtime) == int(src_stat.st_mtime):
+                    return None, None
+            FileUtils._copy_file_fast(src_path, dst_path)
+            shutil.copystat(src_path, dst_path)
+            return src_stat.st_size, None
+        except OSError as e:
+            return None, e
+
+    @staticmethod
+    def _copy_dir_incremental(
+        src: str,
+        dst: str,
+        symlinks: bool,
+        ignore: Callable[[str, list[str]], Iterable[str]] | None,
+        compare: str,
+        workers: int,
+    ) -> CopyDirResult:
+        """
+        Copy the tree at src into dst on a thread pool, skipping files that already match at dst
+            errors are collected and raised together as shutil.Error once every file was tried, like copytree
+
+        :param src:
+        :param dst:
+        :param symlinks:
+        :param ignore:
+        :param compare:
+        :param workers:
+        :return: CopyDirResult
+        """
+
+        files, dirs, errors = [], [], []
+        copied = skipped = bytes_copied = 0
+        pending = [(src, dst)]
+        while pending:
+            src_dir, dst_dir = pending.pop()
+            os.makedirs(dst_dir, exist_ok=True)
+            dirs.append((src_dir, dst_dir))
+            with os.scandir(src_dir) as it:
+                entries = list(it)
+            ignored = ignore(src_dir, [e.name for e in entries]) if ignore else ()
+            for entry in entries:
+                if entry.name in ignored:
+                    continue
+                dst_path = os.path.join(dst_dir, entry.name)
+                if symlinks and entry.is_symlink():
+                    link = os.readlink(entry.path)
+                    if os.path.islink(dst_path) and os.readlink(dst_path) == link:
+                        skipped += 1
+                        continue
+                    if os.path.lexists(dst_path):
+                        os.remove(dst_path)
+                    os.symlink(link, dst_path)
+                    copied += 1
+                elif entry.is_dir():
+                    pending.append((entry.path, dst_path))
+                else:
+                    files.append((entry.path, dst_path))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda f: FileUtils._copy_dir_task(f[0], f[1], compare), files)
+            for (src_path, dst_path), (size, error) in zip(files, results):
+                if error is not None:
+                    errors.append((src_path, dst_path, str(error)))
+                elif size is None:
+                    skipped += 1
+                else:
+                    copied += 1
+                    bytes_copied += size
+
+        # directory times are restored last, copying files into them changes their mtime
+        for src_dir, dst_dir in reversed(dirs):
+            try:
+                shutil.copystat(src_dir, dst_dir)
+            except OSError as e:
+                errors.append((src_dir, dst_dir, str(e)))
+        if errors:
+            raise shutil.Error(errors)
+        return CopyDirResult(copied, skipped, bytes_copied)
+
+    @staticmethod
+    def copy_dir(
+        src: str,
+        dst: str,
+        symlinks: bool = False,
+        ignore=None,
+        incremental: bool = False,
+        compare: Literal["stat", "hash"] = "stat",
+        workers: int | None = 1,
+    ) -> bool | CopyDirResult:
+        """
+        Copy files from src to dst and returns True if the copy was successfull
+            incremental skips files whose size and mtime (or content with compare="hash") already match at dst
+            and copies the rest on a thread pool of workers threads (None for all cores),
+            returning CopyDirResult with copied, skipped and bytes_copied instead of True
+
+        :param src:
+        :param dst:
+        :param symlinks:
+        :param ignore:
+        :param incremental:
+        :param compare:
+        :param workers:
+        :return: True | CopyDirResult
+        """
+
+        try:
+            if incremental:
+                workers = workers or os.cpu_count() or 1
+                return FileUtils._copy_dir_incremental(src, dst, symlinks, ignore, compare, workers)
+            shutil.copytree(src, dst, symlinks, ignore, dirs_exist_ok=True)
+        except IOError as e:
+            sys.stderr.write(repr(e))
+            raise e
+        return True
+
+    @staticmethod
+    def _get_session() -> requests.Session:
+        """
+        Returns the requests.Session shared by every download, created on first use
+            with a connection pool big enough for concurrent and segmented downloads
+
+        :return: requests.Session
+        """
+
+        global _session
+        with _session_lock:
+            if _session is None:
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=constants.DOWNLOAD_POOL_SIZE,
+                    pool_maxsize=constants.DOWNLOAD_POOL_SIZE,
+                )
+                _session = requests.Session()
+                _session.mount("http://", adapter)
+                _session.mount("https://", adapter)
+            return _session
+
+    @staticmethod
+    def _download_retry(func: Callable[[int], object], retries: int, backoff: float) -> object:
+        """
+        Call func(attempt) until it succeeds, retrying transient failures (connection errors, timeouts,
+            broken chunked bodies, 429 and 5xx) up to retries times with exponential backoff and full jitter
+
+        :param func:
+        :param retries:
+        :param backoff:
+        :return: object
+        """
+
+        attempt = 0
+        while True:
+            try:
+                return func(attempt)
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                transient = isinstance(
+                    e, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+                ) or (status == 429 or (status is not None and status >= 500))
+                if attempt >= retries or not transient:
+                    raise
+                time.sleep(random.uniform(0, min(constants.DOWNLOAD_MAX_BACKOFF, backoff * 2**attempt)))
+                attempt += 1
+
+    @staticmethod
+    def _download_write(
+        req: requests.Response,
+        outfile: BinaryIO,
+        chunk_size: int,
+        limiter: RateLimiter | None,
+    ) -> int:
+        """
+        Write the body of req to outfile, paced by limiter, and returns the number of bytes written
+
+        :param req:
+        :param outfile:
+        :param chunk_size:
+        :param limiter:
+        :return: int
+        """
+
+        written = 0
+        for chunk in req.iter_content(chunk_size=chunk_size):
+            if limiter:
+                limiter.consume(len(chunk))
+            outfile.write(chunk)
+            written += len(chunk)
+        return written
+
+    @staticmethod
+    def _download_segmented(
+        session: requests.Session,
+        remote_file_url: str,
+        local_file_path: str,
+        segments: int,
+        chunk_size: int,
+        timeout: float | None = None,
+        limiter: RateLimiter | None = None,
+        retries: int = 0,
+        backoff: float = constants.DOWNLOAD_BACKOFF,
+    ) -> requests.structures.CaseInsensitiveDict | None:
+        """
+        Download remote_file_url as segments byte ranges fetched concurrently into a preallocated
+            <local_file_path>.part file that replaces local_file_path only once every range is complete,
+            and returns the HEAD response headers,
+            or None without touching local_file_path when the server does not support ranges
+            a failed segment is retried from the last byte it wrote, and a failed download removes the .part file
+
+        :param session:
+        :param remote_file_url:
+        :param local_file_path:
+        :param segments:
+        :param chunk_size:
+        :param timeout:
+        :param limiter:
+        :param retries:
+        :param backoff:
+        :return: requests.structures.CaseInsensitiveDict | None
+        """
+
+        def fetch_head(attempt: int) -> requests.Response:
+            with session.head(remote_file_url, allow_redirects=True, timeout=timeout) as head:
+                head.raise_for_status()
+                return head
+
+        head = FileUtils._download_retry(fetch_head, retries, backoff)
+        size = int(head.headers.get("Content-Length") or 0)
+        if head.headers.get("Accept-Ranges", "").lower() != "bytes" or size < segments:
+            return None
+        validator = head.headers.get("ETag") or head.headers.get("Last-Modified")
+
+        def fetch(start: int, end: int) -> None:
+            written = 0
+
+            def fetch_range(attempt: int) -> None:
+                nonlocal written
+                headers = {"Range": f"bytes={start + written}-{end}"}
+                if validator:
+                    headers["If-Range"] = validator
+                with session.get(remote_file_url, headers=headers, stream=True, timeout=timeout) as req:
+                    req.raise_for_status()
+                    if req.status_code != 206:
+                        raise requests.HTTPError(f"Range request not honoured: {req.status_code}", response=req)
+                    with open(part_file_path, "r+b") as outfile:
+                        outfile.seek(start + written)
+                        for chunk in req.iter_content(chunk_size=chunk_size):
+                            if limiter:
+                                limiter.consume(len(chunk))
+                            outfile.write(chunk)
+                            written += len(chunk)
+                if written != end - start + 1:
+                    raise requests.ConnectionError(f"Incomplete range {start}-{end}: {written} bytes")
+
+            FileUtils._download_retry(fetch_range, retries, backoff)
+
+        # the holes of a preallocated file would pass for data to a later resume, so it never gets the real name
+        part_file_path = f"{local_file_path}.part"
+        try:
+            with open(part_file_path, "wb") as outfile:
+                outfile.truncate(size)
+            bounds = [(i * size // segments, (i + 1) * size // segments - 1) for i in range(segments)]
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                list(executor.map(lambda b: fetch(*b), bounds))
+            os.replace(part_file_path, local_file_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(part_file_path)
+            raise
+        return head.headers
+
+    @staticmethod
+    def _download_cache_load(cache_dir: str, remote_file_url: str) -> dict | None:
+        """
+        Returns the cached validator metadata of remote_file_url or None if there is none
+
+        :param cache_dir:
+        :param remote_file_url:
+        :return: dict | None
+        """
+
+        meta_path = os.path.join(cache_dir, f"{hashlib.sha256(remote_file_url.encode()).hexdigest()}.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _download_cache_validators(
+        cache_dir: str,
+        remote_file_url: str,
+        local_file_path: str,
+        cache_bodies: bool,
+    ) -> dict[str, str]:
+        """
+        Returns the If-None-Match / If-Modified-Since headers for remote_file_url,
+            empty when nothing usable is cached: a 304 is only useful if the local file still has the
+            cached size or its body is in the content-addressed store
+
+        :param cache_dir:
+        :param remote_file_url:
+        :param local_file_path:
+        :param cache_bodies:
+        :return: dict[str, str]
+        """
+
+        if not (meta := FileUtils._download_cache_load(cache_dir, remote_file_url)):
+            return {}
+        local_ok = os.path.isfile(local_file_path) and os.path.getsize(local_file_path) == meta["size"]
+        body_ok = cache_bodies and meta["digest"] and os.path.isfile(os.path.join(cache_dir, "objects", meta["digest"]))
+        if not (local_ok or body_ok):
+            return {}
+        headers = {}
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["last_modified"]:
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def _download_cache_restore(cache_dir: str, remote_file_url: str, local_file_path: str) -> None:
+        """
+        Make local_file_path current after a 304, copying the body from the store when the local file is gone
+
+        :param cache_dir:
+        :param remote_file_url:
+        :param local_file_path:
+        :return: None
+        """
+
+        meta = FileUtils._download_cache_load(cache_dir, remote_file_url)
+        if os.path.isfile(local_file_path) and os.path.getsize(local_file_path) == meta["size"]:
+            return
+        FileUtils._copy_file_fast(os.path.join(cache_dir, "objects", meta["digest"]), local_file_path)
+
+    @staticmethod
+    def _download_cache_store(
+        cache_dir: str,
+        remote_file_url: str,
+        local_file_path: str,
+        headers: requests.structures.CaseInsensitiveDict,
+        cache_bodies: bool,
+    ) -> None:
+        """
+        Record the ETag / Last-Modified of a completed download of remote_file_url
+            and with cache_bodies keep a copy of the body under its sha256, so identical payloads are stored once
+
+        :param cache_dir:
+        :param remote_file_url:
+        :param local_file_path:
+        :param headers:
+        :param cache_bodies:
+        :return: None
+        """
+
+        meta_path = os.path.join(cache_dir, f"{hashlib.sha256(remote_file_url.encode()).hexdigest()}.json")
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            if os.path.isfile(meta_path):
+                os.remove(meta_path)
+            return
+
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        digest = None
+        if cache_bodies:
+            with open(local_file_path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            object_path = os.path.join(cache_dir, "objects", digest)
+            if not os.path.isfile(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                FileUtils._copy_file_fast(local_file_path, object_path + tmp_suffix)
+                os.replace(object_path + tmp_suffix, object_path)
+
+        meta = {
+            "url": remote_file_url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": os.path.getsize(local_file_path),
+            "digest": digest,
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + tmp_suffix, meta_path)
+
+    @staticmethod
+    def download_file(
+        remote_file_url: str,
+        local_file_path: str,
+        chunk_size: int = constants.DOWNLOAD_CHUNK_SIZE,
+        resume: bool = False,
+        segments: int = 1,
+        session: requests.Session | None = None,
+        timeout: float | None = None,
+        cache_dir: str | None = None,
+        cache_bodies: bool = False,
+        rate_limit: float | RateLimiter | None = None,
+        retries: int = 0,
+        backoff: float = constants.DOWNLOAD_BACKOFF,
+    ) -> bool:
+        """
+        Download file from remote url to local
+            and returns True if the download was successfull
+            connections are pooled on a shared requests.Session unless session is given
+            resume continues a partial local file with an HTTP Range request
+            segments > 1 fetches that many byte ranges concurrently when the server accepts ranges
+            timeout bounds the connect and every read, in seconds
+            cache_dir keeps the ETag / Last-Modified of each url and sends them back as a conditional request,
+            so an unchanged file answered with 304 is not transferred again;
+            cache_bodies also stores bodies by content hash, restoring deleted local files without a transfer
+            rate_limit caps the transfer in bytes per second, pass the same RateLimiter to cap concurrent calls
+            retries retries transient failures with exponential backoff and jitter, resuming from the last byte written
+
+        :param remote_file_url:
+        :param local_file_path:
+        :param chunk_size:
+        :param resume:
+        :param segments:
+        :param session:
+        :param timeout:
+        :param cache_dir:
+        :param cache_bodies:
+        :param rate_limit:
+        :param retries:
+        :param backoff:
+        :return: True
+        """
+
+        session = session or FileUtils._get_session()
+        limiter = rate_limit if isinstance(rate_limit, RateLimiter) or rate_limit is None else RateLimiter(rate_limit)
+        try:
+            validators = {}
+            if cache_dir:
+                validators = FileUtils._download_cache_validators(
+                    cache_dir, remote_file_url, local_file_path, cache_bodies
+                )
+
+            response_headers = None
+            if not validators and segments > 1 and not (resume and os.path.isfile(local_file_path)):
+                response_headers = FileUtils._download_segmented(
+                    session, remote_file_url, local_file_path, segments, chunk_size, timeout, limiter, retries, backoff
+                )
+
+            if response_headers is None:
+                # set once this call starts writing, so only bytes written by it are resumed on a retry
+                started = False
+                # validator of the body being written, so a resumed retry never splices two versions
+                if_range = None
+                resume = resume and not validators
+
+                def fetch(attempt: int) -> requests.structures.CaseInsensitiveDict | None:
+                    nonlocal started, if_range
+                    offset = 0
+                    if (resume or started) and os.path.isfile(local_file_path):
+                        offset = os.path.getsize(local_file_path)
+                    conditional = not started and not offset and bool(validators)
+                    if offset:
+                        headers = {"Range": f"bytes={offset}-"}
+                        if if_range:
+                            headers["If-Range"] = if_range
+                    else:
+                        headers = validators if conditional else {}
+                    with session.get(remote_file_url, headers=headers, stream=True, timeout=timeout) as req:
+                        if conditional and req.status_code == 304:
+                            FileUtils._download_cache_restore(cache_dir, remote_file_url, local_file_path)
+                            return None
+                        if (
+                            offset
+                            and req.status_code == 416
+                            and req.headers.get("Content-Range") == f"bytes */{offset}"
+                        ):
+                            # nothing left past offset, the local file is already complete
+                            return None
+                        req.raise_for_status()
+                        append = bool(offset) and req.status_code == 206
+                        if append and not req.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                            raise requests.HTTPError(f"Unexpected Content-Range: {req.headers.get('Content-Range')}")
+                        if not append:
+                            if_range = req.headers.get("ETag") or req.headers.get("Last-Modified")
+                        started = True
+                        with open(local_file_path, "ab" if append else "wb") as outfile:
+                            FileUtils._download_write(req, outfile, chunk_size, limiter)
+                        return req.headers
+
+                response_headers = FileUtils._download_retry(fetch, retries, backoff)
+
+            if cache_dir and response_headers is not None:
+                FileUtils._download_cache_store(
+                    cache_dir, remote_file_url, local_file_path, response_headers, cache_bodies
+                )
+        except (requests.RequestException, OSError) as e:
+            sys.stderr.write(repr(e))
+            raise e
+        return True
+
+    @staticmethod
+    def download_many(
+        downloads: Iterable[tuple[str, str]],
+        workers: int = constants.DOWNLOAD_POOL_SIZE,
+        per_host: int | None = None,
+        **kwargs,
+    ) -> list[DownloadResult]:
+        """
+        Download every (remote_file_url, local_file_path) pair on a pool of workers threads
+            and returns one DownloadResult per pair, in the same order, with size, duration and error
+            per_host caps the concurrent downloads to any single host: each host has its own queue
+            and a download only takes a worker once its host has a free slot,
+            so a slow or failing url only holds its own worker and never stops the batch
+            duration is measured from the moment the download starts, not from when it was queued
+            any other keyword argument is passed to download_file
+
+        :param downloads:
+        :param workers:
+        :param per_host:
+        :param kwargs:
+        :return: list[DownloadResult]
+        """
+
+        def download_one(item: tuple[str, str]) -> DownloadResult:
+            remote_file_url, local_file_path = item
+            start = time.perf_counter()
+            size, error = 0, None
+            try:
+                FileUtils.download_file(remote_file_url, local_file_path, **kwargs)
+                size = os.path.getsize(local_file_path)
+            except (requests.RequestException, OSError) as e:
+                error = e
+            return DownloadResult(remote_file_url, Path(local_file_path), size, time.perf_counter() - start, error)
+
+        downloads = list(downloads)
+        if not downloads:
+            return []
+        workers = min(workers, len(downloads))
+        limit = per_host or workers
+
+        # one queue per host, and a download is only handed to the pool once its host has a free slot,
+        # so a busy host never parks workers that downloads from other hosts could use
+        queues: dict[str, deque[int]] = {}
+        for index, (remote_file_url, _) in enumerate(downloads):
+            host = urlsplit(remote_file_url).netloc if per_host else ""
+            queues.setdefault(host, deque()).append(index)
+        active = dict.fromkeys(queues, 0)
+        results: list[DownloadResult | None] = [None] * len(downloads)
+        running: dict[Future, tuple[int, str]] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while queues or running:
+                submitted = True
+                while submitted and len(running) < workers:
+                    submitted = False
+                    for host in list(queues):
+                        if len(running) >= workers:
+                            break
+                        if active[host] < limit:
+                            index = queues[host].popleft()
+                            if not queues[host]:
+                                del queues[host]
+                            active[host] += 1
+                            running[executor.submit(download_one, downloads[index])] = (index, host)
+                            submitted = True
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, host = running.pop(future)
+                    active[host] -= 1
+                    results[index] = future.result()
+        return results
+
+    @staticmethod
+    def get_exe_binary_type(file_path: str) -> str | None:
+        """
+        Returns the binary type of the given EXE file
+
+        :param file_path:
+        :return: str | None
+        """
+
+        with open(file_path, "rb") as f:
+            if (_ := f.read(2)) != b"MZ":
+                return "Not an EXE file"
+            f.seek(60)
+            header_offset = struct.unpack("<L", f.read(4))[0]
+            f.seek(header_offset + 4)
+            machine = struct.unpack("<H", f.read(2))[0]
+            match machine:
+                case 332:
+                    # IA32 (32-bit x86)
+                    binary_type = "IA32"
+                case 512:
+                    # IA64 (Itanium)
+                    binary_type = "IA64"
+                case 34404:
+                    # IAMD64 (64-bit x86)
                     binary_type = "AMD64"
                 case 452:
                     # IARM eabi (32-bit)
@@ -260,6 +2615,768 @@ class FileUtils:
                     binary_type = None
         return binary_type
 
+    @staticmethod
+    def _read_binary_type(path: str) -> tuple[str | None, str | None, int | None]:
+        """
+        Returns the (format, arch, bits) of the given PE, ELF or Mach-O file from a single header read
+            a PE header beyond the first read costs one extra read, unknown files return (None, None, None)
+
+        :param path:
+        :return: tuple[str | None, str | None, int | None]
+        """
+
+        with open(path, "rb") as f:
+            header = f.read(constants.BINARY_HEADER_SIZE)
+            if header[:2] == b"MZ" and len(header) >= 64:
+                pe_offset = struct.unpack_from("<L", header, 60)[0]
+                pe = header[pe_offset : pe_offset + 6]
+                if len(pe) < 6:
+                    f.seek(pe_offset)
+                    pe = f.read(6)
+                if len(pe) < 6 or pe[:4] != b"PE\0\0":
+                    return None, None, None
+                arch, bits = _PE_MACHINES.get(struct.unpack_from("<H", pe, 4)[0], (None, None))
+                return "PE", arch, bits
+
+        if header[:4] == b"\x7fELF" and len(header) >= 20:
+            bits = {1: 32, 2: 64}.get(header[4])
+            byte_order = {1: "<", 2: ">"}.get(header[5])
+            if not bits or not byte_order:
+                return None, None, None
+            return "ELF", _ELF_MACHINES.get(struct.unpack_from(f"{byte_order}H", header, 18)[0]), bits
+
+        if len(header) >= 8:
+            magic = header[:4]
+            if magic in (b"\xfe\xed\xfa\xce", b"\xfe\xed\xfa\xcf", b"\xce\xfa\xed\xfe", b"\xcf\xfa\xed\xfe"):
+                byte_order = ">" if magic[0] == 0xFE else "<"
+                arch, bits = _MACHO_CPU_TYPES.get(struct.unpack_from(f"{byte_order}I", header, 4)[0], (None, None))
+                return "Mach-O", arch, bits
+            if magic == b"\xca\xfe\xba\xbe":
+                # java class files share this magic, their version field is far above any real arch count
+                nfat_arch = struct.unpack_from(">I", header, 4)[0]
+                if 0 < nfat_arch < 32 and len(header) >= 8 + nfat_arch * 20:
+                    cpu_types = struct.unpack_from(">" + "I16x" * nfat_arch, header, 8)
+                    archs = [_MACHO_CPU_TYPES.get(c, (f"0x{c:x}", None))[0] for c in cpu_types]
+                    return "Mach-O universal", ",".join(archs), None
+        return None, None, None
+
+    @staticmethod
+    def _binary_type_task(path: str) -> BinaryInfo:
+        """
+        Returns the BinaryInfo of the given file, reading its header only when
+            its (inode, size, mtime) changed since the last scan
+
+        :param path:
+        :return: BinaryInfo
+        """
+
+        try:
+            st = os.stat(path)
+            stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+            with _binary_type_lock:
+                cached = _binary_type_cache.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+            info = BinaryInfo(Path(path), *FileUtils._read_binary_type(path), None)
+            with _binary_type_lock:
+                _binary_type_cache[path] = (stamp, info)
+            return info
+        except OSError as e:
+            return BinaryInfo(Path(path), None, None, None, e)
+
+    @staticmethod
+    def scan_binary_types(
+        source: str | Iterable[str],
+        pattern: str = "*",
+        recursive: bool = True,
+        workers: int | None = None,
+        cache_file: str | None = None,
+    ) -> list[BinaryInfo]:
+        """
+        Detect the format (PE, ELF, Mach-O) and architecture of every file in the given directory
+            matching pattern, or of every path in source, on a pool of workers threads
+            each file costs one stat and one header read, and results are cached in memory by
+            (inode, size, mtime) so a re-scan only reads the files that changed
+            cache_file keeps that cache on disk between runs
+            returns one BinaryInfo per file, format is None for anything that is not a binary
+
+        :param source:
+        :param pattern:
+        :param recursive:
+        :param workers:
+        :param cache_file:
+        :return: list[BinaryInfo]
+        """
+
+        if cache_file:
+            FileUtils._binary_type_cache_load(cache_file)
+
+        if isinstance(source, (str, os.PathLike)):
+            paths = [
+                entry.path
+                for entry in FileUtils._scan_entries(source, recursive=recursive)
+                if fnmatch.fnmatch(entry.name, pattern) and entry.is_file(follow_symlinks=False)
+            ]
+        else:
+            paths = [os.fspath(p) for p in source]
+
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(FileUtils._binary_type_task, paths))
+
+        if cache_file:
+            FileUtils._binary_type_cache_store(cache_file)
+        return results
+
+    @staticmethod
+    def _binary_type_cache_load(cache_file: str) -> None:
+        """
+        Merge the binary types saved in cache_file into the in-memory cache
+
+        :param cache_file:
+        :return: None
+        """
+
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        with _binary_type_lock:
+            for path, (ino, size, mtime_ns, fmt, arch, bits) in saved.items():
+                _binary_type_cache.setdefault(
+                    path, ((ino, size, mtime_ns), BinaryInfo(Path(path), fmt, arch, bits, None))
+                )
+
+    @staticmethod
+    def _binary_type_cache_store(cache_file: str) -> None:
+        """
+        Atomically write the in-memory binary type cache to cache_file
+
+        :param cache_file:
+        :return: None
+        """
+
+        with _binary_type_lock:
+            saved = {
+                path: [*stamp, info.format, info.arch, info.bits] for path, (stamp, info) in _binary_type_cache.items()
+            }
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(saved, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def hash_file(
+        file_path: str,
+        algorithm: str = "sha256",
+        chunk_size: int = constants.HASH_CHUNK_SIZE,
+    ) -> str:
+        """
+        Returns the hex digest of the given file with any hashlib algorithm
+            the file is streamed through a single reusable buffer of chunk_size bytes,
+            so memory stays flat for any file size
+
+        :param file_path:
+        :param algorithm:
+        :param chunk_size:
+        :return: str
+        """
+
+        digest = hashlib.new(algorithm)
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                while n := f.readinto(buffer):
+                    digest.update(view[:n])
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+        # shake algorithms have no fixed length, 32 bytes are returned for them
+        return digest.hexdigest(32) if digest.digest_size == 0 else digest.hexdigest()
+
+    @staticmethod
+    def hash_many(
+        file_paths: Iterable[str],
+        algorithm: str = "sha256",
+        workers: int | None = None,
+        chunk_size: int = constants.HASH_CHUNK_SIZE,
+        cache_file: str | None = None,
+    ) -> list[HashResult]:
+        """
+        Hash every given file on a pool of workers threads and returns one HashResult per file, in the same order
+            hashlib releases the GIL while hashing, so threads scale across cores
+            cache_file keeps digests keyed by (path, size, mtime_ns, inode) between runs,
+            and files that did not change since are not read again
+            failures are reported in HashResult.error instead of stopping the batch
+
+        :param file_paths:
+        :param algorithm:
+        :param workers:
+        :param chunk_size:
+        :param cache_file:
+        :return: list[HashResult]
+        """
+
+        # fail early on an unknown algorithm instead of once per file
+        hashlib.new(algorithm)
+        cache = FileUtils._hash_cache_load(cache_file) if cache_file else {}
+        cache_lock = threading.Lock()
+
+        def hash_one(path: str) -> HashResult:
+            try:
+                stat_time = time.time_ns()
+                st = os.stat(path)
+                stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+                with cache_lock:
+                    cached = cache.get(path)
+                if cached and cached[:3] == stamp and algorithm in cached[3]:
+                    return HashResult(Path(path), cached[3][algorithm], st.st_size, True, None)
+                digest = FileUtils.hash_file(path, algorithm, chunk_size)
+                # a file written within the timestamp resolution of the stat may change again without a new mtime,
+                # so the stat time is what counts, however long the hash took
+                if stat_time - st.st_mtime_ns > constants.RACY_WINDOW_NS:
+                    with cache_lock:
+                        digests = cached[3] if cached and cached[:3] == stamp else {}
+                        cache[path] = [*stamp, {**digests, algorithm: digest}]
+                return HashResult(Path(path), digest, st.st_size, False, None)
+            except OSError as e:
+                return HashResult(Path(path), None, 0, False, e)
+
+        file_paths = [os.fspath(p) for p in file_paths]
+        if not file_paths:
+            return []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(hash_one, file_paths))
+
+        if cache_file:
+            FileUtils._hash_cache_store(cache_file, cache)
+        return results
+
+    @staticmethod
+    def _hash_cache_load(cache_file: str) -> dict[str, list]:
+        """
+        Returns the digests saved in cache_file, empty when it is missing or unreadable
+
+        :param cache_file:
+        :return: dict[str, list]
+        """
+
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _hash_cache_store(cache_file: str, cache: dict[str, list]) -> None:
+        """
+        Atomically write the digests to cache_file
+
+        :param cache_file:
+        :param cache:
+        :return: None
+        """
+
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+
+    @staticmethod
+    def _partial_hash(file_path: str, size: int, block_size: int) -> str:
+        """
+        Returns a quick digest of the first and last block_size bytes of the given file
+
+        :param file_path:
+        :param size:
+        :param block_size:
+        :return: str
+        """
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            digest.update(f.read(block_size))
+            f.seek(max(0, size - block_size))
+            digest.update(f.read(block_size))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hardlink_duplicate(keep: str, keep_st: os.stat_result, duplicate: str, st: os.stat_result) -> None:
+        """
+        Atomically replace duplicate with a hardlink to keep,
+            unless keep or duplicate changed since they were scanned
+
+        :param keep:
+        :param keep_st:
+        :param duplicate:
+        :param st:
+        :return: None
+        """
+
+        for path, scanned in ((keep, keep_st), (duplicate, st)):
+            current = os.stat(path, follow_symlinks=False)
+            if (current.st_size, current.st_mtime_ns) != (scanned.st_size, scanned.st_mtime_ns):
+                raise OSError(errno.EBUSY, "file changed since it was hashed", path)
+        tmp_file = f"{duplicate}.{os.getpid()}.tmp"
+        os.link(keep, tmp_file)
+        try:
+            os.replace(tmp_file, duplicate)
+        except OSError:
+            os.remove(tmp_file)
+            raise
+
+    @staticmethod
+    def find_duplicates(
+        source: str | Iterable[str],
+        pattern: str = "*",
+        recursive: bool = True,
+        min_size: int = 1,
+        algorithm: str = "sha256",
+        workers: int | None = None,
+        hardlink: bool = False,
+        block_size: int = constants.DUPLICATE_BLOCK_SIZE,
+    ) -> Iterator[DuplicateGroup]:
+        """
+        Lazily yields a DuplicateGroup for every set of files with identical content
+            in the given directory, or directories, matching pattern, biggest files first
+            files are grouped by size, then by a hash of their first and last block_size bytes,
+            and only files still sharing a group are fully hashed, on a pool of workers threads
+            paths that are already hardlinks of the same file count once
+            hardlink replaces every duplicate with a hardlink to the first path of its group,
+            failures are reported in DuplicateGroup.errors
+
+        :param source:
+        :param pattern:
+        :param recursive:
+        :param min_size:
+        :param algorithm:
+        :param workers:
+        :param hardlink:
+        :param block_size:
+        :return: Iterator[DuplicateGroup]
+        """
+
+        hashlib.new(algorithm)
+        roots = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+        by_size: dict[int, list[tuple[str, os.stat_result]]] = {}
+        seen_inodes = set()
+        for root in roots:
+            for entry in FileUtils._scan_entries(root, recursive=recursive):
+                if not fnmatch.fnmatch(entry.name, pattern) or not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                if st.st_size < min_size:
+                    continue
+                if not st.st_ino:
+                    # DirEntry leaves the inode empty on Windows
+                    st = os.stat(entry.path, follow_symlinks=False)
+                if (st.st_dev, st.st_ino) in seen_inodes:
+                    continue
+                seen_inodes.add((st.st_dev, st.st_ino))
+                by_size.setdefault(st.st_size, []).append((entry.path, st))
+        del seen_inodes
+        size_groups = sorted(((size, files) for size, files in by_size.items() if len(files) > 1), key=lambda g: -g[0])
+        del by_size
+
+        def first_pass(item: tuple[str, os.stat_result]) -> str | None:
+            path, st = item
+            try:
+                if st.st_size <= block_size * 2:
+                    # the first and last blocks already cover the whole file
+                    return FileUtils.hash_file(path, algorithm)
+                return FileUtils._partial_hash(path, st.st_size, block_size)
+            except OSError:
+                return None
+
+        def full_pass(item: tuple[str, os.stat_result]) -> str | None:
+            try:
+                return FileUtils.hash_file(item[0], algorithm)
+            except OSError:
+                return None
+
+        def regroup(files: list[tuple[str, os.stat_result]], digests: Iterable[str | None]) -> list[list]:
+            buckets: dict[str, list[tuple[str, os.stat_result]]] = {}
+            for item, digest in zip(files, digests):
+                if digest is not None:
+                    buckets.setdefault(digest, []).append(item)
+            return [[digest, items] for digest, items in buckets.items() if len(items) > 1]
+
+        def resolve(batch: list[tuple[int, list[tuple[str, os.stat_result]]]]) -> Iterator[DuplicateGroup]:
+            files = [item for _, group in batch for item in group]
+            first_digests = iter(list(executor.map(first_pass, files)))
+            candidates = []
+            for size, group in batch:
+                for digest, items in regroup(group, [next(first_digests) for _ in group]):
+                    candidates.append((size, digest, items))
+
+            needs_full = [item for size, _, items in candidates if size > block_size * 2 for item in items]
+            full_digests = iter(list(executor.map(full_pass, needs_full)))
+            for size, digest, items in candidates:
+                groups = [[digest, items]]
+                if size > block_size * 2:
+                    groups = regroup(items, [next(full_digests) for _ in items])
+                for digest, members in groups:
+                    members.sort(key=lambda item: item[0])
+                    errors = {}
+                    if hardlink:
+                        keep, keep_st = members[0]
+                        for path, st in members[1:]:
+                            try:
+                                FileUtils._hardlink_duplicate(keep, keep_st, path, st)
+                            except OSError as e:
+                                errors[path] = e
+                    yield DuplicateGroup(size, digest, [Path(path) for path, _ in members], errors)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch, batch_files = [], 0
+            for size, files in size_groups:
+                batch.append((size, files))
+                batch_files += len(files)
+                # bounded batches keep memory flat and let the first groups stream out early
+                if batch_files >= constants.DUPLICATE_BATCH_SIZE:
+                    yield from resolve(batch)
+                    batch, batch_files = [], 0
+            if batch:
+                yield from resolve(batch)
+
+    @staticmethod
+    def snapshot(
+        root: str,
+        hash_algorithm: str | None = None,
+        workers: int | None = None,
+        prune_dirs: str | Iterable[str] | None = None,
+        previous: dict[str, SnapshotEntry] | None = None,
+    ) -> dict[str, SnapshotEntry]:
+        """
+        Returns a SnapshotEntry (size, mtime_ns, inode, digest) for every regular file under root,
+            keyed by its path relative to root with / separators
+            directories are read with scandir on a pool of workers threads, one task per directory
+            hash_algorithm also records each file's digest as <algorithm>:<hex>, reusing the digest from previous
+            for files whose size, mtime_ns and inode did not change
+            directories whose name matches a prune_dirs glob are skipped entirely
+
+        :param root:
+        :param hash_algorithm:
+        :param workers:
+        :param prune_dirs:
+        :param previous:
+        :return: dict[str, SnapshotEntry]
+        """
+
+        root = os.path.abspath(root)
+        prune_dirs = [prune_dirs] if isinstance(prune_dirs, str) else prune_dirs
+        previous = previous or {}
+
+        def scan_dir(directory: str) -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+            files, subdirs = [], []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not prune_dirs or not any(fnmatch.fnmatch(entry.name, p) for p in prune_dirs):
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        # DirEntry leaves the inode empty on Windows
+                        files.append((entry.path, st if st.st_ino else os.stat(entry.path, follow_symlinks=False)))
+            return files, subdirs
+
+        def hash_one(path: str) -> str | None:
+            try:
+                return f"{prefix}{FileUtils.hash_file(path, hash_algorithm)}"
+            except FileNotFoundError:
+                return None
+
+        # digests carry their algorithm, so a digest is never reused for another algorithm
+        prefix = f"{hash_algorithm}:"
+        snapshot: dict[str, SnapshotEntry] = {}
+        to_hash: list[tuple[str, str]] = []
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = {executor.submit(scan_dir, root)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files, subdirs = future.result()
+                        pending.update(executor.submit(scan_dir, d) for d in subdirs)
+                        for path, st in files:
+                            rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+                            entry = SnapshotEntry(st.st_size, st.st_mtime_ns, st.st_ino, None)
+                            old = previous.get(rel_path)
+                            if (
+                                hash_algorithm
+                                and old
+                                and old[:3] == entry[:3]
+                                and old.digest
+                                and old.digest.startswith(prefix)
+                            ):
+                                entry = old
+                            elif hash_algorithm:
+                                to_hash.append((rel_path, path))
+                            snapshot[rel_path] = entry
+
+                if to_hash:
+                    digests = executor.map(hash_one, [path for _, path in to_hash])
+                    for (rel_path, _), digest in zip(to_hash, digests):
+                        if digest is None:
+                            # removed between the scan and the hash
+                            del snapshot[rel_path]
+                        else:
+                            snapshot[rel_path] = snapshot[rel_path]._replace(digest=digest)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+        return dict(sorted(snapshot.items()))
+
+    @staticmethod
+    def save_snapshot(snapshot: dict[str, SnapshotEntry], file_path: str) -> Path:
+        """
+        Atomically write the given snapshot to file_path as gzip compressed json and returns its Path
+
+        :param snapshot:
+        :param file_path:
+        :return: Path
+        """
+
+        data = {"version": 1, "entries": [[path, *entry] for path, entry in snapshot.items()]}
+        tmp_file = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            with gzip.open(tmp_file, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, file_path)
+            return Path(file_path)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            if os.path.isfile(tmp_file):
+                os.remove(tmp_file)
+            raise e
+
+    @staticmethod
+    def load_snapshot(file_path: str) -> dict[str, SnapshotEntry]:
+        """
+        Returns the snapshot saved in file_path by save_snapshot
+
+        :param file_path:
+        :return: dict[str, SnapshotEntry]
+        """
+
+        try:
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except OSError as e:
+            sys.stderr.write(repr(e))
+            raise e
+        if data.get("version") != 1:
+            raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+        return {path: SnapshotEntry(*fields) for path, *fields in data["entries"]}
+
+    @staticmethod
+    def diff_snapshots(old: dict[str, SnapshotEntry], new: dict[str, SnapshotEntry]) -> SnapshotDiff:
+        """
+        Compare two snapshots and returns the sorted relative paths added, removed and modified in new
+            files hashed in both snapshots are modified when their size or digest differ,
+            so a touch without a content change is not reported;
+            otherwise any change of size, mtime_ns or inode counts
+
+        :param old:
+        :param new:
+        :return: SnapshotDiff
+        """
+
+        added = sorted(path for path in new if path not in old)
+        removed = sorted(path for path in old if path not in new)
+        modified = []
+        for path, entry in new.items():
+            before = old.get(path)
+            if before is None:
+                continue
+            if entry.digest and before.digest:
+                changed = entry.size != before.size or entry.digest != before.digest
+            else:
+                changed = entry[:3] != before[:3]
+            if changed:
+                modified.append(path)
+        return SnapshotDiff(added, removed, sorted(modified))
+
+    @staticmethod
+    def diff_tree(
+        root: str,
+        snapshot_file: str,
+        hash_algorithm: str | None = None,
+        workers: int | None = None,
+        prune_dirs: str | Iterable[str] | None = None,
+        update: bool = True,
+    ) -> SnapshotDiff:
+        """
+        Scan root, compare it against the snapshot saved in snapshot_file and returns what changed since
+            a missing snapshot_file reports every file as added
+            update saves the new scan to snapshot_file, so the next call reports only newer changes
+
+        :param root:
+        :param snapshot_file:
+        :param hash_algorithm:
+        :param workers:
+        :param prune_dirs:
+        :param update:
+        :return: SnapshotDiff
+        """
+
+        old = FileUtils.load_snapshot(snapshot_file) if os.path.isfile(snapshot_file) else {}
+        new = FileUtils.snapshot(root, hash_algorithm, workers, prune_dirs, previous=old)
+        diff = FileUtils.diff_snapshots(old, new)
+        if update:
+            FileUtils.save_snapshot(new, snapshot_file)
+        return diff
+
+    @staticmethod
+    def watch(
+        path: str,
+        interval: float = 1.0,
+        recursive: bool = True,
+        pattern: str = "*",
+        prune_dirs: str | Iterable[str] | None = None,
+    ) -> Iterator[WatchEvent]:
+        """
+        Returns an endless iterator of WatchEvent for every file created, modified or deleted under path
+            after this call, polling every interval seconds with a DirectoryWatcher
+
+        :param path:
+        :param interval:
+        :param recursive:
+        :param pattern:
+        :param prune_dirs:
+        :return: Iterator[WatchEvent]
+        """
+
+        # the initial state is taken now, not on the first next()
+        return iter(DirectoryWatcher(path, interval, recursive, pattern, prune_dirs))
+
+    @staticmethod
+    def find_older_than(
+        root: str,
+        days: int,
+        recursive: bool = True,
+        pattern: str = "*",
+        prune_dirs: str | Iterable[str] | None = None,
+    ) -> Iterator[os.DirEntry]:
+        """
+        Lazily yields the os.DirEntry of every file under root matching pattern
+            whose modification time is older than the specified number of days
+            the cutoff is computed once and each entry's cached stat is reused by the caller
+
+        :param root:
+        :param days:
+        :param recursive:
+        :param pattern:
+        :param prune_dirs:
+        :return: Iterator[os.DirEntry]
+        """
+
+        try:
+            cutoff_timestamp = (datetime.now() - timedelta(days=int(days))).timestamp()
+        except (OSError, ValueError, OverflowError):
+            # nothing can be older than a cutoff out of the datetime range
+            return
+
+        for entry in FileUtils._scan_entries(root, recursive=recursive, prune_dirs=prune_dirs):
+            if (
+                fnmatch.fnmatch(entry.name, pattern)
+                and entry.is_file(follow_symlinks=False)
+                and entry.stat(follow_symlinks=False).st_mtime < cutoff_timestamp
+            ):
+                yield entry
+
+    @staticmethod
+    def sweep_older_than(
+        root: str,
+        days: int,
+        action: Literal["delete", "gzip", "move"] | Callable[[str], object] = "delete",
+        target_dir: str | None = None,
+        recursive: bool = True,
+        pattern: str = "*",
+        workers: int | None = 1,
+    ) -> dict[str, OSError]:
+        """
+        Apply action to every file found by find_older_than on a pool of workers threads (None for all cores)
+            and returns the errors by path, empty when every file was handled
+            delete unlinks the file, gzip compresses it into <file name>.gz in target_dir (or next to it)
+            and removes the original once the archive is verified, move puts it under target_dir keeping its path
+            relative to root, and any callable is called with the file path
+            files are handed to the pool while the tree is still being scanned
+
+        :param root:
+        :param days:
+        :param action:
+        :param target_dir:
+        :param recursive:
+        :param pattern:
+        :param workers:
+        :return: dict[str, OSError]
+        """
+
+        if action == "move" and not target_dir:
+            raise ValueError("target_dir is required to move files")
+
+        def gzip_one(path: str) -> None:
+            if path.lower().endswith(".gz"):
+                # already an archive, and gzip would write it onto itself
+                return
+            output_file = os.path.join(target_dir or os.path.dirname(path), f"{os.path.basename(path)}.gz")
+            # the archive is created exclusively, so a name already taken is reported instead of overwritten
+            result = FileUtils._rotate_task(path, output_file, constants.GZIP_COMPRESS_LEVEL)
+            if result.error is not None:
+                raise result.error
+
+        def move_one(path: str) -> None:
+            destination = os.path.join(target_dir, os.path.relpath(path, root))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(path, destination)
+
+        actions = {"delete": os.unlink, "gzip": gzip_one, "move": move_one}
+        func = action if callable(action) else actions.get(action)
+        if func is None:
+            raise ValueError(f"Invalid action: {action}")
+
+        def apply(path: str) -> OSError | None:
+            try:
+                func(path)
+            except OSError as e:
+                return e
+            return None
+
+        skip_prefix = os.path.join(os.path.abspath(target_dir), "") if target_dir else None
+        errors: dict[str, OSError] = {}
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: deque[tuple[str, Future]] = deque()
+            for entry in FileUtils.find_older_than(root, days, recursive, pattern):
+                if skip_prefix and os.path.abspath(entry.path).startswith(skip_prefix):
+                    # files already moved into a target_dir inside root
+                    continue
+                pending.append((entry.path, executor.submit(apply, entry.path)))
+                # keep a bounded number of files in flight so huge trees never queue every path at once
+                while len(pending) > workers * 2 or (pending and pending[0][1].done()):
+                    path, future = pending.popleft()
+                    if (error := future.result()) is not None:
+                        errors[path] = error
+            for path, future in pending:
+                if (error := future.result()) is not None:
+                    errors[path] = error
+        return errors
+
     @staticmethod
     def is_older_than_x_days(path: str, days: int) -> bool:
         """
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Compare the registered compression codecs on a sample corpus, reporting MB/s and ratio
+
+Usage: python tests/benchmarks/bench_codecs.py [corpus_dir | size_mb] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from ddcUtils import FileUtils
+
+
+def make_sample(path: str, size_mb: int) -> None:
+    """Write a mixed sample file of roughly size_mb megabytes: log lines, json records and random bytes"""
+    line = b"2024-01-01 00:00:00.000 INFO [worker-%05d] processed request id=%010d status=200\n"
+    record = b'{"id": %d, "name": "item-%d", "tags": ["a", "b", "c"], "price": %d.99}\n'
+    with open(path, "wb") as f:
+        i = 0
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(b"".join(line % (n % 64, n) for n in range(i, i + 5000)))
+            f.write(b"".join(record % (n, n, n % 1000) for n in range(i, i + 2000)))
+            f.write(os.urandom(16 * 1024))
+            i += 5000
+
+
+def load_corpus(source: str) -> bytes:
+    """Concatenate every file of the corpus directory"""
+    return b"".join(path.read_bytes() for path in FileUtils.iter_files(source, recursive=True) if path.is_file())
+
+
+def run(data: bytes, codec: str, workers: int) -> tuple[float, float, int]:
+    """Compress and decompress data, returning (compress seconds, decompress seconds, compressed size)"""
+    start = time.perf_counter()
+    compressed = FileUtils.compress(data, codec=codec, workers=workers)
+    compress_time = time.perf_counter() - start
+    start = time.perf_counter()
+    assert FileUtils.decompress(compressed, codec=codec) == data
+    return compress_time, time.perf_counter() - start, len(compressed)
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else "64"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    if os.path.isdir(source):
+        data = load_corpus(source)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sample = os.path.join(temp_dir, "sample.bin")
+            make_sample(sample, int(source))
+            with open(sample, "rb") as f:
+                data = f.read()
+    mb = len(data) / (1024 * 1024)
+    print(f"corpus: {mb:.1f} MB, codecs: {', '.join(FileUtils.list_codecs())}")
+
+    print(f"{'codec':<24}{'comp MB/s':>12}{'decomp MB/s':>14}{'ratio':>10}")
+    for codec in FileUtils.list_codecs():
+        for label, count in ((codec, 1), (f"{codec} x{workers}", workers)):
+            compress_time, decompress_time, size = run(data, codec, count)
+            print(f"{label:<24}{mb / compress_time:>12.1f}{mb / decompress_time:>14.1f}{len(data) / size:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
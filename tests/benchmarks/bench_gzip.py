@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Compare FileUtils.gzip throughput between the single-stream path and the parallel block mode
+
+Usage: python tests/benchmarks/bench_gzip.py [size_mb] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from ddcUtils import FileUtils
+
+
+def make_sample(path: str, size_mb: int) -> None:
+    """Write a log-like sample file of roughly size_mb megabytes"""
+    line = b"2024-01-01 00:00:00.000 INFO [worker-%05d] processed request id=%010d status=200\n"
+    with open(path, "wb") as f:
+        i = 0
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(b"".join(line % (n % 64, n) for n in range(i, i + 10000)))
+            i += 10000
+
+
+def run(input_file: str, **kwargs) -> tuple[float, int]:
+    """Gzip input_file with the given options and return (seconds, compressed size)"""
+    start = time.perf_counter()
+    result = FileUtils.gzip(input_file, **kwargs)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(result)
+    os.remove(result)
+    return elapsed, size
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_file = os.path.join(temp_dir, "sample.log")
+        make_sample(input_file, size_mb)
+        input_size = os.path.getsize(input_file)
+
+        print(f"{'mode':<24}{'seconds':>10}{'MB/s':>10}{'ratio':>10}")
+        for label, kwargs in (
+            ("single-stream", {"workers": 1}),
+            (f"parallel x{workers}", {"workers": workers}),
+        ):
+            elapsed, size = run(input_file, **kwargs)
+            mbps = input_size / elapsed / (1024 * 1024)
+            print(f"{label:<24}{elapsed:>10.2f}{mbps:>10.1f}{input_size / size:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+import pytest
+from ddcUtils import AsyncFileUtils, FileUtils
+
+
+class TestAsyncFileUtils:
+    @classmethod
+    def setup_class(cls):
+        """
+        Leaving empty for further use
+        """
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        """
+        Leaving empty for further use
+        """
+        pass
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(self.temp_dir, f"file_{i}.txt"), "w") as f:
+                f.write("content " * 100)
+
+    def teardown_method(self):
+        FileUtils.remove(self.temp_dir)
+
+    def test_mirrors_file_utils(self):
+        # Test public static methods are exposed with their docs, iter_zip is left out
+        assert AsyncFileUtils.copy.__doc__ == FileUtils.copy.__doc__
+        assert asyncio.iscoroutinefunction(AsyncFileUtils.gzip)
+        assert asyncio.iscoroutinefunction(AsyncFileUtils.download_file)
+        assert not hasattr(AsyncFileUtils, "iter_zip")
+        assert not hasattr(AsyncFileUtils, "_gzip_task")
+
+    def test_coroutines(self):
+        # Test coroutine calls run off the event loop thread and return the FileUtils results
+        async def main():
+            async with AsyncFileUtils(max_workers=2) as afu:
+                src = os.path.join(self.temp_dir, "file_0.txt")
+                dst = os.path.join(self.temp_dir, "copy.txt")
+                assert await afu.copy(src, dst)
+                assert os.path.isfile(dst)
+                archive = await afu.gzip(src)
+                assert archive == Path(self.temp_dir, "file_0.gz")
+                files = await afu.list_files(self.temp_dir, ends_with=".txt", sort_by="name")
+                assert [f.name for f in files] == ["copy.txt", *[f"file_{i}.txt" for i in range(5)]]
+                assert await afu.run(threading.get_ident) != threading.get_ident()
+                with pytest.raises(FileNotFoundError):
+                    await afu.hash_file(os.path.join(self.temp_dir, "missing"))
+
+        asyncio.run(main())
+
+    def test_bounded_concurrency(self):
+        # Test no more than max_workers calls run at once
+        active, peak = 0, 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+        async def main():
+            async with AsyncFileUtils(max_workers=3) as afu:
+                await asyncio.gather(*(afu.run(work) for _ in range(12)))
+
+        asyncio.run(main())
+        assert peak == 3
+
+    def test_cancellation(self):
+        # Test calls waiting for a slot are cancelled without ever running
+        started = []
+        release = threading.Event()
+
+        def blocking(i):
+            started.append(i)
+            release.wait(5)
+            return i
+
+        async def main():
+            async with AsyncFileUtils(max_workers=1) as afu:
+                first = asyncio.create_task(afu.run(blocking, 0))
+                waiting = asyncio.create_task(afu.run(blocking, 1))
+                await asyncio.sleep(0.05)
+                waiting.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await waiting
+                release.set()
+                assert await first == 0
+                assert await afu.run(blocking, 2) == 2
+
+        asyncio.run(main())
+        assert started == [0, 2]
+
+    def test_async_iterators(self):
+        # Test listings stream in batches and stopping early closes the underlying generator
+        async def main():
+            async with AsyncFileUtils(batch_size=2) as afu:
+                names = sorted([p.name async for p in afu.iter_files(self.temp_dir)])
+                assert names == [f"file_{i}.txt" for i in range(5)]
+                old = [e async for e in afu.find_older_than(self.temp_dir, 0)]
+                assert len(old) == 5
+
+                closed = threading.Event()
+
+                def numbers():
+                    try:
+                        yield from range(100)
+                    finally:
+                        closed.set()
+
+                seen = []
+                async with contextlib.aclosing(afu.iterate(numbers)) as iterator:
+                    async for n in iterator:
+                        seen.append(n)
+                        if n == 4:
+                            break
+                assert seen == [0, 1, 2, 3, 4]
+                await afu.run(closed.wait, 5)
+                assert closed.is_set()
+
+        asyncio.run(main())
+
+    def test_async_iterators_break_after_close(self):
+        # Test an iterator finalized after the pool is closed is still closed without errors
+        closed = threading.Event()
+
+        def numbers():
+            try:
+                yield from range(100)
+            finally:
+                closed.set()
+
+        async def main():
+            errors = []
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+            async with AsyncFileUtils(batch_size=2) as afu:
+                async for _ in afu.iter_files(self.temp_dir):
+                    break
+                async for _ in afu.iterate(numbers):
+                    break
+            # let the loop run the async generator finalizers
+            await asyncio.sleep(0.1)
+            return errors
+
+        assert asyncio.run(main()) == []
+        assert closed.is_set()
@@ -1,4 +1,5 @@
 import os
+import sys
 import tempfile
 from pathlib import Path
 import pytest
@@ -116,8 +117,10 @@ class TestFileUtils:
     def test_unzip_file(self):
         # test unzip file and delete afterwards (Unix/Linux)
         result = FileUtils.unzip(self.test_zip_file, self.temp_test_dir)
-        assert result is not None
-        test_file = os.path.join(self.temp_test_dir, result.filelist[0].filename)
+        assert len(result) == 1
+        test_file = os.path.join(self.temp_test_dir, "test_zip_file")
+        assert result[0].path == Path(test_file)
+        assert result[0].size == os.path.getsize(test_file)
         files_list = FileUtils.list_files(self.temp_test_dir)
         assert Path(test_file) in files_list
         FileUtils.remove(test_file)
@@ -163,14 +166,14 @@ class TestFileUtils:
 
         dst_file = os.path.join(self.test_files_dir, "test_download.txt")
 
-        # Mock the requests.get to avoid actual network call
+        # Mock the shared session get to avoid actual network call
         mock_response = unittest.mock.MagicMock()
         mock_response.status_code = 200
         mock_response.iter_content.return_value = [b"test content chunk"]
         mock_response.__enter__.return_value = mock_response
         mock_response.__exit__.return_value = None
 
-        with unittest.mock.patch('requests.get', return_value=mock_response):
+        with unittest.mock.patch('requests.Session.get', return_value=mock_response):
             result = FileUtils.download_file("https://example.com/test.txt", dst_file)
             assert result is True
 
@@ -236,12 +239,11 @@ class TestFileUtils:
     def test_unzip_file_no_output_path(self):
         # test unzip file without specifying output path
         result = FileUtils.unzip(self.test_zip_file)
-        assert result is not None
+        assert result[0].path.parent == Path(self.test_files_dir)
         # Clean up extracted files
-        for file_info in result.filelist:
-            extracted_file = os.path.join(self.test_files_dir, file_info.filename)
-            if os.path.exists(extracted_file):
-                FileUtils.remove(extracted_file)
+        for member in result:
+            if member.path.exists():
+                FileUtils.remove(str(member.path))
 
     def test_unzip_file_exception(self):
         # Test unzip with invalid file
@@ -287,7 +289,7 @@ class TestFileUtils:
 
         dst_file = os.path.join(self.test_files_dir, "test_download_fail.txt")
 
-        with unittest.mock.patch('requests.get', side_effect=requests.RequestException("Network error")):
+        with unittest.mock.patch('requests.Session.get', side_effect=requests.RequestException("Network error")):
             with pytest.raises(requests.RequestException):
                 FileUtils.download_file("https://example.com/test.txt", dst_file)
 
@@ -409,7 +411,7 @@ class TestFileUtils:
         import unittest.mock
 
         with unittest.mock.patch('os.path.isdir', return_value=True):
-            with unittest.mock.patch('os.listdir', side_effect=PermissionError("Permission denied")):
+            with unittest.mock.patch('os.scandir', side_effect=PermissionError("Permission denied")):
                 with pytest.raises(PermissionError):
                     FileUtils.list_files("/some/directory")
 
@@ -427,17 +429,17 @@ class TestFileUtils:
         output_dir = tempfile.mkdtemp()
 
         try:
-            # Create a mock that first creates a file, then raises exception
-            def mock_gzip_open(filename, mode):
-                # Create the output file first
-                with open(filename, 'w') as f:
-                    f.write("partial")
+            # Create a mock that first writes partial output, then raises exception
+            def mock_gzip_file(fileobj, mode, **kwargs):
+                # Write to the output file first
+                fileobj.write(b"partial")
                 # Then raise an exception
                 raise IOError("Compression failed")
 
-            with unittest.mock.patch('gzip.open', side_effect=mock_gzip_open):
+            with unittest.mock.patch('gzip.GzipFile', side_effect=mock_gzip_file):
                 with pytest.raises(IOError):
                     FileUtils.gzip(input_file, output_dir)
+            assert os.listdir(output_dir) == []
         finally:
             # Clean up
             if os.path.exists(input_file):
@@ -446,3 +448,1645 @@ class TestFileUtils:
 
             if os.path.exists(output_dir):
                 shutil.rmtree(output_dir)
+
+    def test_gzip_parallel(self):
+        # Test parallel gzip produces a multi-member stream with the same content
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        input_file = os.path.join(temp_dir, "parallel.log")
+        data = b"".join(f"line {i} some log payload\n".encode() for i in range(20000))
+        with open(input_file, "wb") as f:
+            f.write(data)
+
+        try:
+            result_file = FileUtils.gzip(input_file, workers=4, block_size=64 * 1024, compresslevel=6)
+            assert result_file == Path(temp_dir, "parallel.gz")
+            with open(result_file, "rb") as f:
+                compressed = f.read()
+            assert gzip.decompress(compressed) == data
+            # one member per block, every member starts with the gzip magic
+            assert compressed.count(b"\x1f\x8b\x08") >= len(data) // (64 * 1024)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_parallel_empty_file(self):
+        # Test parallel gzip still writes a valid gzip stream for an empty file
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        input_file = os.path.join(temp_dir, "empty.log")
+        open(input_file, "wb").close()
+
+        try:
+            result_file = FileUtils.gzip(input_file, workers=None)
+            with open(result_file, "rb") as f:
+                assert gzip.decompress(f.read()) == b""
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_chunked_mtime(self):
+        # Test chunked streaming with a fixed mtime gives reproducible output
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        input_file = os.path.join(temp_dir, "dump.bin")
+        # binary payload with no newlines at all
+        data = bytes(range(256)) * 4096
+        with open(input_file, "wb") as f:
+            f.write(data)
+
+        try:
+            first = FileUtils.gzip(input_file, chunk_size=4096, compresslevel=1, mtime=0)
+            with open(first, "rb") as f:
+                first_bytes = f.read()
+            second = FileUtils.gzip(input_file, chunk_size=1024 * 1024, compresslevel=1, mtime=0)
+            with open(second, "rb") as f:
+                second_bytes = f.read()
+            assert first_bytes == second_bytes
+            assert gzip.decompress(first_bytes) == data
+            # mtime is stored little-endian at offset 4 of the header
+            assert first_bytes[4:8] == b"\x00\x00\x00\x00"
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_in_memory(self):
+        # Test bytes and file object inputs are compressed in memory
+        import gzip
+        import io
+
+        data = b"in memory payload\n" * 1000
+
+        result = FileUtils.gzip(data, mtime=0)
+        assert isinstance(result, bytes)
+        assert gzip.decompress(result) == data
+
+        result = FileUtils.gzip(io.BytesIO(data), workers=2, block_size=4096)
+        assert gzip.decompress(result) == data
+
+        with open(self.test_file, "rb") as f:
+            result = FileUtils.gzip(f)
+        with open(self.test_file, "rb") as f:
+            assert gzip.decompress(result) == f.read()
+
+    def test_gzip_dir(self):
+        # Test batch compression of a directory with verified removal of the originals
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        contents = {}
+        for i in range(5):
+            name = os.path.join(temp_dir, f"app_{i}.log")
+            contents[name] = f"log file {i}\n".encode() * (i + 1) * 100
+            with open(name, "wb") as f:
+                f.write(contents[name])
+        with open(os.path.join(temp_dir, "old.gz"), "wb") as f:
+            f.write(gzip.compress(b"already compressed"))
+
+        try:
+            results = FileUtils.gzip_dir(temp_dir, "*.log", workers=2, remove_source=True)
+            assert len(results) == 5
+            for result in results:
+                assert result.error is None
+                assert result.removed is True
+                assert result.bytes_in == len(contents[str(result.input_file)])
+                assert result.bytes_out == os.path.getsize(result.output_file)
+                assert result.duration >= 0
+                assert not result.input_file.exists()
+                with gzip.open(result.output_file, "rb") as f:
+                    assert f.read() == contents[str(result.input_file)]
+            # .gz files are never picked up again
+            results = FileUtils.gzip_dir(temp_dir)
+            assert all(not str(r.input_file).endswith(".gz") for r in results)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_dir_glob(self):
+        # Test batch compression from a glob pattern into another directory
+        temp_dir = tempfile.mkdtemp()
+        out_dir = tempfile.mkdtemp()
+        for name in ("a.txt", "b.txt", "c.csv"):
+            with open(os.path.join(temp_dir, name), "w") as f:
+                f.write(name)
+
+        try:
+            results = FileUtils.gzip_dir(os.path.join(temp_dir, "*.txt"), output_dir=out_dir, workers=1)
+            assert sorted(r.output_file.name for r in results) == ["a.gz", "b.gz"]
+            assert all(r.removed is False and r.input_file.exists() for r in results)
+        finally:
+            FileUtils.remove(temp_dir)
+            FileUtils.remove(out_dir)
+
+    def test_gzip_many_errors(self):
+        # Test gzip_many reports failures per file instead of raising
+        assert FileUtils.gzip_many([]) == []
+        results = FileUtils.gzip_many(["/nonexistent/file.log", self.test_file], output_dir=self.temp_test_dir)
+        assert isinstance(results[0].error, FileNotFoundError)
+        assert results[0].output_file is None
+        assert results[1].error is None
+        FileUtils.remove(str(results[1].output_file))
+
+    def test_gzip_verify(self):
+        # Test archive verification rejects truncated and mismatched archives
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        output_file = os.path.join(temp_dir, "verify.gz")
+        with open(output_file, "wb") as f:
+            f.write(gzip.compress(b"x" * 1000))
+
+        try:
+            assert FileUtils._gzip_verify(output_file, 1000) is True
+            assert FileUtils._gzip_verify(output_file, 999) is False
+            with open(output_file, "r+b") as f:
+                f.truncate(10)
+            assert FileUtils._gzip_verify(output_file, 1000) is False
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_verify_content(self):
+        # Test archive verification against the source rejects same-size different content
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        output_file = os.path.join(temp_dir, "verify.gz")
+        source_file = os.path.join(temp_dir, "verify.log")
+        with open(output_file, "wb") as f:
+            f.write(gzip.compress(b"x" * 1000))
+
+        try:
+            with open(source_file, "wb") as f:
+                f.write(b"x" * 1000)
+            assert FileUtils._gzip_verify(output_file, 1000, 64, source_file) is True
+            with open(source_file, "wb") as f:
+                f.write(b"x" * 999 + b"y")
+            assert FileUtils._gzip_verify(output_file, 1000, 64, source_file) is False
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gzip_dir_name_collision(self):
+        # Test inputs sharing an archive name are never overwritten or removed
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        out_dir = tempfile.mkdtemp()
+        for name, data in (("app.log", b"LOGDATA1"), ("app.txt", b"TXTDATA2")):
+            with open(os.path.join(temp_dir, name), "wb") as f:
+                f.write(data)
+        os.makedirs(os.path.join(temp_dir, "x"))
+        os.makedirs(os.path.join(temp_dir, "y"))
+        for name in ("x", "y"):
+            with open(os.path.join(temp_dir, name, "a.log"), "wb") as f:
+                f.write(name.encode())
+
+        try:
+            results = FileUtils.gzip_dir(temp_dir, "app.*", workers=1, remove_source=True)
+            ok, collided = sorted(results, key=lambda r: r.error is not None)
+            assert ok.error is None and ok.removed is True
+            assert isinstance(collided.error, FileExistsError)
+            assert collided.removed is False and collided.output_file is None
+            assert collided.input_file.exists()
+            with gzip.open(ok.output_file, "rb") as f:
+                assert f.read() == (b"LOGDATA1" if ok.input_file.name == "app.log" else b"TXTDATA2")
+
+            paths = [os.path.join(temp_dir, "x", "a.log"), os.path.join(temp_dir, "y", "a.log")]
+            results = FileUtils.gzip_many(paths, output_dir=out_dir, workers=2, remove_source=True)
+            assert results[0].error is None and results[0].removed is True
+            assert isinstance(results[1].error, FileExistsError)
+            assert os.path.isfile(paths[1])
+            with gzip.open(os.path.join(out_dir, "a.gz"), "rb") as f:
+                assert f.read() == b"x"
+
+            # an archive already on disk, like yesterday's rotation, is never replaced
+            with open(os.path.join(temp_dir, "app.log"), "wb") as f:
+                f.write(b"TODAY")
+            archive = ok.output_file
+            with open(archive, "rb") as f:
+                yesterday = f.read()
+            results = FileUtils.gzip_dir(temp_dir, "app.log", workers=1, remove_source=True)
+            assert isinstance(results[0].error, FileExistsError)
+            assert results[0].removed is False and results[0].output_file is None
+            assert os.path.isfile(os.path.join(temp_dir, "app.log"))
+            with open(archive, "rb") as f:
+                assert f.read() == yesterday
+        finally:
+            FileUtils.remove(temp_dir)
+            FileUtils.remove(out_dir)
+
+    def test_gzip_task_verification_failure(self):
+        # Test the source is kept when its archive cannot be verified
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        input_file = os.path.join(temp_dir, "keep.log")
+        with open(input_file, "w") as f:
+            f.write("keep me")
+
+        try:
+            with unittest.mock.patch.object(FileUtils, "_gzip_verify", return_value=False):
+                result = FileUtils._gzip_task(input_file, None, 6, True)
+            assert result.removed is False
+            assert isinstance(result.error, OSError)
+            assert os.path.isfile(input_file)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gunzip_round_trip(self):
+        # Test gunzip restores a multi-member archive written by the parallel gzip
+        temp_dir = tempfile.mkdtemp()
+        out_dir = tempfile.mkdtemp()
+        input_file = os.path.join(temp_dir, "round.log")
+        data = os.urandom(1024) * 300
+        with open(input_file, "wb") as f:
+            f.write(data)
+
+        try:
+            archive = FileUtils.gzip(input_file, workers=3, block_size=32 * 1024)
+            result = FileUtils.gunzip(str(archive), out_dir, chunk_size=4096)
+            assert result == Path(out_dir, "round")
+            with open(result, "rb") as f:
+                assert f.read() == data
+            # the output can go straight back into gzip
+            with open(result, "rb") as f:
+                assert FileUtils.gunzip(FileUtils.gzip(f)) == data
+        finally:
+            FileUtils.remove(temp_dir)
+            FileUtils.remove(out_dir)
+
+    def test_gunzip_in_memory(self):
+        # Test gunzip with bytes and file object input handles concatenated members
+        import gzip
+        import io
+
+        stream = gzip.compress(b"first ") + gzip.compress(b"second")
+        assert FileUtils.gunzip(stream) == b"first second"
+        assert FileUtils.gunzip(io.BytesIO(stream)) == b"first second"
+
+    def test_gunzip_output_name_and_errors(self):
+        # Test gunzip naming without .gz suffix and cleanup of a corrupt archive
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        plain = os.path.join(temp_dir, "archive")
+        with open(plain, "wb") as f:
+            f.write(gzip.compress(b"payload"))
+        corrupt = os.path.join(temp_dir, "corrupt.gz")
+        with open(corrupt, "wb") as f:
+            f.write(gzip.compress(b"payload" * 100)[:-12])
+
+        try:
+            result = FileUtils.gunzip(plain)
+            assert result == Path(temp_dir, "archive.out")
+            with pytest.raises(EOFError):
+                FileUtils.gunzip(corrupt)
+            assert not os.path.exists(os.path.join(temp_dir, "corrupt"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gunzip_many(self):
+        # Test batch decompression with source removal and per-file errors
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        paths = []
+        for i in range(3):
+            path = os.path.join(temp_dir, f"part_{i}.gz")
+            with open(path, "wb") as f:
+                f.write(gzip.compress(f"part {i}".encode()))
+            paths.append(path)
+        bad = os.path.join(temp_dir, "bad.gz")
+        with open(bad, "wb") as f:
+            f.write(b"not gzip data")
+
+        try:
+            assert FileUtils.gunzip_many([]) == []
+            results = FileUtils.gunzip_many(paths + [bad], workers=2, remove_source=True)
+            for i, result in enumerate(results[:3]):
+                assert result.error is None
+                assert result.removed is True
+                assert result.bytes_out == len(f"part {i}")
+                assert not os.path.exists(paths[i])
+            assert isinstance(results[3].error, gzip.BadGzipFile)
+            assert os.path.exists(bad)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_gunzip_many_name_collision(self):
+        # Test archives sharing an output name, or whose output already exists, are never overwritten or removed
+        import gzip
+
+        temp_dir = tempfile.mkdtemp()
+        out_dir = os.path.join(temp_dir, "out")
+        os.makedirs(out_dir)
+        paths = []
+        for name in ("x", "y", "z"):
+            os.makedirs(os.path.join(temp_dir, name))
+            path = os.path.join(temp_dir, name, "b.gz" if name == "z" else "a.gz")
+            with open(path, "wb") as f:
+                f.write(gzip.compress(name.encode()))
+            paths.append(path)
+        with open(os.path.join(out_dir, "b"), "wb") as f:
+            f.write(b"already here")
+
+        try:
+            results = FileUtils.gunzip_many(paths, output_dir=out_dir, workers=2, remove_source=True)
+            assert results[0].error is None and results[0].removed is True
+            for result in results[1:]:
+                assert isinstance(result.error, FileExistsError)
+                assert result.removed is False
+                assert result.input_file.exists()
+            with open(os.path.join(out_dir, "a"), "rb") as f:
+                assert f.read() == b"x"
+            with open(os.path.join(out_dir, "b"), "rb") as f:
+                assert f.read() == b"already here"
+            with pytest.raises(FileExistsError):
+                FileUtils.gunzip(paths[2], out_dir)
+            assert os.path.isfile(os.path.join(out_dir, "b"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_unzip_parallel_with_filters(self):
+        # Test threaded extraction of selected members only
+        import zipfile
+
+        temp_dir = tempfile.mkdtemp()
+        out_dir = os.path.join(temp_dir, "out")
+        archive = os.path.join(temp_dir, "many.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("docs/", "")
+            for i in range(40):
+                zipf.writestr(f"data/{i // 10}/file_{i}.csv", f"id,value\n{i},{i * i}\n")
+                zipf.writestr(f"data/{i // 10}/file_{i}.tmp", "scratch")
+            zipf.writestr("readme.txt", "hello")
+
+        try:
+            result = FileUtils.unzip(archive, out_dir, include="data/*", exclude=["*.tmp", "data/3/*"], workers=4)
+            assert len(result) == 30
+            for member in result:
+                assert member.path.suffix == ".csv"
+                assert member.size == os.path.getsize(member.path)
+            assert not os.path.exists(os.path.join(out_dir, "readme.txt"))
+            assert not os.path.exists(os.path.join(out_dir, "data", "3"))
+            with open(os.path.join(out_dir, "data", "1", "file_12.csv")) as f:
+                assert f.read() == "id,value\n12,144\n"
+
+            result = FileUtils.unzip(archive, out_dir, include=["docs/*", "readme.*"], workers=None)
+            assert [m.path.name for m in result] == ["readme.txt"]
+            assert os.path.isdir(os.path.join(out_dir, "docs"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_unzip_member_target_sanitized(self):
+        # Test member names cannot escape the output directory
+        out_dir = os.path.join(self.temp_test_dir, "out")
+        assert FileUtils._zip_member_target("../../etc/passwd", out_dir) == os.path.join(out_dir, "etc", "passwd")
+        assert FileUtils._zip_member_target("/abs/./file", out_dir) == os.path.join(out_dir, "abs", "file")
+
+    def test_iter_zip(self):
+        # Test members are streamed lazily without extracting to disk
+        import csv
+        import io
+        import zipfile
+
+        temp_dir = tempfile.mkdtemp()
+        archive = os.path.join(temp_dir, "stream.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("reports/", "")
+            zipf.writestr("reports/a.csv", "id,total\n1,10\n2,20\n")
+            zipf.writestr("reports/b.csv", "id,total\n3,30\n")
+            zipf.writestr("notes.txt", "ignored")
+
+        try:
+            totals = {}
+            for info, stream in FileUtils.iter_zip(archive, include="*.csv"):
+                rows = list(csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8")))
+                totals[info.filename] = sum(int(r["total"]) for r in rows)
+            assert totals == {"reports/a.csv": 30, "reports/b.csv": 30}
+            assert os.listdir(temp_dir) == ["stream.zip"]
+
+            # streams are closed once the consumer moves on
+            members = FileUtils.iter_zip(archive, exclude="reports/*")
+            info, stream = next(members)
+            assert info.filename == "notes.txt"
+            assert stream.read() == b"ignored"
+            members.close()
+            assert stream.closed
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_iter_zip_exception(self):
+        # Test iter_zip with an invalid archive
+        with pytest.raises(FileNotFoundError):
+            next(FileUtils.iter_zip("/nonexistent/file.zip"))
+        with pytest.raises(Exception):
+            next(FileUtils.iter_zip(self.test_file))
+
+    def test_list_files_sort_and_recursive(self):
+        # Test sort keys, recursive listing and directory pruning
+        temp_dir = tempfile.mkdtemp()
+        now = 1_700_000_000
+        for i, (name, size) in enumerate((("c.log", 30), ("a.log", 10), ("b.txt", 20))):
+            path = os.path.join(temp_dir, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            os.utime(path, (now + i, now + i))
+        os.makedirs(os.path.join(temp_dir, "sub", "deep"))
+        os.makedirs(os.path.join(temp_dir, ".git"))
+        for rel in (("sub", "d.log"), ("sub", "deep", "e.log"), (".git", "f.log")):
+            with open(os.path.join(temp_dir, *rel), "w") as f:
+                f.write("x")
+
+        try:
+            names = lambda result: [p.name for p in result]
+            assert names(FileUtils.list_files(temp_dir, ends_with=".log", sort_by="mtime")) == ["c.log", "a.log"]
+            assert names(FileUtils.list_files(temp_dir, ends_with=".log", sort_by="size")) == ["a.log", "c.log"]
+            assert names(FileUtils.list_files(temp_dir, sort_by="name")) == [".git", "a.log", "b.txt", "c.log", "sub"]
+            assert sorted(names(FileUtils.list_files(temp_dir, sort_by=None))) == [
+                ".git",
+                "a.log",
+                "b.txt",
+                "c.log",
+                "sub",
+            ]
+
+            result = FileUtils.list_files(temp_dir, ends_with=".LOG", recursive=True, prune_dirs=".git")
+            assert sorted(names(result)) == ["a.log", "c.log", "d.log", "e.log"]
+            assert Path(temp_dir, "sub", "deep", "e.log") in result
+
+            with pytest.raises(ValueError):
+                FileUtils.list_files(temp_dir, sort_by="owner")
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_iter_files(self):
+        # Test the lazy generator variant
+        import types
+
+        result = FileUtils.iter_files(self.test_files_dir, starts_with="TEST", ends_with=".ini")
+        assert isinstance(result, types.GeneratorType)
+        assert list(result) == [Path(self.test_file)]
+        assert list(FileUtils.iter_files("/nonexistent/directory")) == []
+
+    def test_list_files_stat_once(self):
+        # Test each entry is stat'ed through its cached DirEntry, never through Path.stat
+        import unittest.mock
+
+        with unittest.mock.patch.object(Path, "stat", side_effect=AssertionError("extra stat")):
+            result = FileUtils.list_files(self.test_files_dir)
+        assert Path(self.test_file) in result
+
+    def test_iter_files_exception(self):
+        # Test exception handling in iter_files
+        import unittest.mock
+
+        with unittest.mock.patch('os.scandir', side_effect=PermissionError("Permission denied")):
+            with pytest.raises(PermissionError):
+                list(FileUtils.iter_files(self.test_files_dir))
+
+    def test_list_files_cache(self):
+        # Test cached listings are reused until the directory changes
+        import time
+        import unittest.mock
+        from ddcUtils import ListingCache
+
+        temp_dir = tempfile.mkdtemp()
+        for name in ("a.job", "b.job"):
+            with open(os.path.join(temp_dir, name), "w") as f:
+                f.write(name)
+
+        cache = ListingCache(maxsize=2)
+        # trust directories changed right before the scan, timestamps here are fine grained
+        cache._racy_window_ns = 0
+        try:
+            first = FileUtils.list_files(temp_dir, cache=cache)
+            assert cache.misses == 1
+            with unittest.mock.patch('os.scandir', side_effect=AssertionError("listing not cached")):
+                assert FileUtils.list_files(temp_dir, cache=cache) == first
+                assert list(FileUtils.iter_files(temp_dir, cache=cache)) == list(first)
+            assert cache.hits == 2
+
+            # adding an entry changes the directory mtime and invalidates the listing
+            time.sleep(0.01)
+            with open(os.path.join(temp_dir, "c.job"), "w") as f:
+                f.write("c")
+            assert len(FileUtils.list_files(temp_dir, cache=cache)) == 3
+            assert cache.misses == 2
+
+            # LRU bound
+            other_dirs = [tempfile.mkdtemp() for _ in range(2)]
+            for other in other_dirs:
+                FileUtils.list_files(other, cache=cache)
+            assert len(cache) == 2
+            for other in other_dirs:
+                FileUtils.remove(other)
+
+            cache.clear()
+            assert len(cache) == 0 and cache.hits == 0
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_list_files_cache_racy_directory(self):
+        # Test directories modified during the racy window are never cached
+        from ddcUtils import ListingCache
+
+        temp_dir = tempfile.mkdtemp()
+        cache = ListingCache()
+        cache._racy_window_ns = 3600 * 1_000_000_000
+        try:
+            FileUtils.list_files(temp_dir, cache=cache)
+            FileUtils.list_files(temp_dir, cache=cache)
+            assert cache.hits == 0 and len(cache) == 0
+            # the shared default cache is used with cache=True
+            assert FileUtils.list_files(self.test_files_dir, cache=True) == FileUtils.list_files(self.test_files_dir)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_copy_fast_path_with_progress(self):
+        # Test copy reports progress and keeps the content and permission bits
+        temp_dir = tempfile.mkdtemp()
+        src = os.path.join(temp_dir, "artifact.bin")
+        data = os.urandom(300 * 1024)
+        with open(src, "wb") as f:
+            f.write(data)
+        os.chmod(src, 0o640)
+
+        try:
+            calls = []
+            assert FileUtils.copy(src, os.path.join(temp_dir, "copy.bin"), lambda c, t: calls.append((c, t)), 64 * 1024)
+            with open(os.path.join(temp_dir, "copy.bin"), "rb") as f:
+                assert f.read() == data
+            assert calls[-1] == (len(data), len(data))
+            assert all(c <= t for c, t in calls)
+            if os.name != "nt":
+                assert os.stat(os.path.join(temp_dir, "copy.bin")).st_mode & 0o777 == 0o640
+
+            # destination directory keeps the source file name
+            sub_dir = os.path.join(temp_dir, "sub")
+            os.makedirs(sub_dir)
+            assert FileUtils.copy(src, sub_dir)
+            assert os.path.getsize(os.path.join(sub_dir, "artifact.bin")) == len(data)
+
+            with pytest.raises(OSError):
+                FileUtils.copy(src, src)
+            assert os.path.getsize(src) == len(data)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="copy_file_range and FICLONE are Linux only")
+    def test_copy_file_fast_fallbacks(self):
+        # Test each copy method falls back to the next one when unsupported
+        import errno
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        src = os.path.join(temp_dir, "src.bin")
+        dst = os.path.join(temp_dir, "dst.bin")
+        data = os.urandom(100 * 1024)
+        with open(src, "wb") as f:
+            f.write(data)
+        unsupported = OSError(errno.EXDEV, "Invalid cross-device link")
+        copy_file_range = os.copy_file_range
+
+        def check(expected):
+            assert FileUtils._copy_file_fast(src, dst, chunk_size=16 * 1024) == expected
+            with open(dst, "rb") as f:
+                assert f.read() == data
+
+        def fail_after_first_chunk(error):
+            calls = []
+
+            def fake(infd, outfd, count):
+                if calls:
+                    raise error
+                calls.append(count)
+                return copy_file_range(infd, outfd, count)
+
+            return fake
+
+        try:
+            with unittest.mock.patch('fcntl.ioctl', side_effect=unsupported):
+                check("copy_file_range")
+                # any error before the first byte hands the copy to shutil
+                for error in (unsupported, OSError(errno.EPERM, "Operation not permitted")):
+                    with unittest.mock.patch('os.copy_file_range', side_effect=error):
+                        check("copyfile")
+                # a partial copy is finished in userspace, and real failures are not swallowed
+                with unittest.mock.patch('os.copy_file_range', side_effect=fail_after_first_chunk(unsupported)):
+                    check("userspace")
+                io_error = OSError(errno.EIO, "I/O error")
+                with unittest.mock.patch('os.copy_file_range', side_effect=fail_after_first_chunk(io_error)):
+                    with pytest.raises(OSError):
+                        FileUtils._copy_file_fast(src, dst, chunk_size=16 * 1024)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="FICLONE is Linux only")
+    def test_copy_file_fast_reflink(self):
+        # Test a successful reflink clone short-circuits the copy
+        import unittest.mock
+
+        calls = []
+        with unittest.mock.patch('fcntl.ioctl', return_value=0):
+            result = FileUtils._copy_file_fast(
+                self.test_file, os.path.join(self.temp_test_dir, "clone.ini"), lambda c, t: calls.append((c, t))
+            )
+        assert result == "reflink"
+        size = os.path.getsize(self.test_file)
+        assert calls == [(size, size)]
+        FileUtils.remove(os.path.join(self.temp_test_dir, "clone.ini"))
+
+    def test_copy_dir_incremental(self):
+        # Test incremental copy only re-copies changed files
+        import shutil
+        import time
+
+        src_dir = tempfile.mkdtemp()
+        dst_dir = os.path.join(tempfile.mkdtemp(), "deploy")
+        os.makedirs(os.path.join(src_dir, "lib", "pkg"))
+        for rel, content in ((("app.py",), "main"), (("lib", "a.py"), "a"), (("lib", "pkg", "b.py"), "bb")):
+            with open(os.path.join(src_dir, *rel), "w") as f:
+                f.write(content)
+        with open(os.path.join(src_dir, "debug.tmp"), "w") as f:
+            f.write("skip me")
+
+        try:
+            ignore = shutil.ignore_patterns("*.tmp")
+            result = FileUtils.copy_dir(src_dir, dst_dir, ignore=ignore, incremental=True, workers=4)
+            assert result == (3, 0, 7)
+            assert not os.path.exists(os.path.join(dst_dir, "debug.tmp"))
+            with open(os.path.join(dst_dir, "lib", "pkg", "b.py")) as f:
+                assert f.read() == "bb"
+
+            # nothing changed, everything is skipped
+            result = FileUtils.copy_dir(src_dir, dst_dir, ignore=ignore, incremental=True, workers=None)
+            assert result.copied == 0 and result.skipped == 3 and result.bytes_copied == 0
+
+            # a modified file with a new mtime is copied again
+            path = os.path.join(src_dir, "lib", "a.py")
+            with open(path, "w") as f:
+                f.write("A")
+            os.utime(path, (time.time() + 10, time.time() + 10))
+            result = FileUtils.copy_dir(src_dir, dst_dir, ignore=ignore, incremental=True)
+            assert result == (1, 2, 1)
+            with open(os.path.join(dst_dir, "lib", "a.py")) as f:
+                assert f.read() == "A"
+
+            # hash mode ignores mtime and compares contents
+            os.utime(path, (time.time() + 100, time.time() + 100))
+            result = FileUtils.copy_dir(src_dir, dst_dir, ignore=ignore, incremental=True, compare="hash")
+            assert result == (0, 3, 0)
+            with open(os.path.join(dst_dir, "app.py"), "w") as f:
+                f.write("edit")
+            result = FileUtils.copy_dir(src_dir, dst_dir, ignore=ignore, incremental=True, compare="hash")
+            assert result == (1, 2, 4)
+        finally:
+            FileUtils.remove(src_dir)
+            FileUtils.remove(os.path.dirname(dst_dir))
+
+    @pytest.mark.skipif(os.name == 'nt', reason="Symlinks need extra privileges on Windows")
+    def test_copy_dir_incremental_symlinks_and_errors(self):
+        # Test symlinks are recreated and per-file errors are raised together
+        import shutil
+        import unittest.mock
+
+        src_dir = tempfile.mkdtemp()
+        dst_dir = tempfile.mkdtemp()
+        with open(os.path.join(src_dir, "target.txt"), "w") as f:
+            f.write("target")
+        os.symlink("target.txt", os.path.join(src_dir, "link.txt"))
+
+        try:
+            result = FileUtils.copy_dir(src_dir, dst_dir, symlinks=True, incremental=True)
+            assert result == (2, 0, 6)
+            assert os.readlink(os.path.join(dst_dir, "link.txt")) == "target.txt"
+            result = FileUtils.copy_dir(src_dir, dst_dir, symlinks=True, incremental=True)
+            assert result == (0, 2, 0)
+
+            with open(os.path.join(src_dir, "other.txt"), "w") as f:
+                f.write("other")
+            with unittest.mock.patch.object(FileUtils, "_copy_file_fast", side_effect=PermissionError("denied")):
+                with pytest.raises(shutil.Error) as exc_info:
+                    FileUtils.copy_dir(src_dir, os.path.join(dst_dir, "new"), incremental=True)
+            # link.txt is followed as a regular file without symlinks=True
+            assert len(exc_info.value.args[0]) == 3
+        finally:
+            FileUtils.remove(src_dir)
+            FileUtils.remove(dst_dir)
+
+    def test_remove_parallel(self):
+        # Test parallel removal of a nested tree
+        temp_dir = tempfile.mkdtemp()
+        tree = os.path.join(temp_dir, "cache")
+        for i in range(5):
+            sub_dir = os.path.join(tree, f"dir_{i}", "nested", "deeper")
+            os.makedirs(sub_dir)
+            os.makedirs(os.path.join(tree, f"empty_{i}"))
+            for j in range(20):
+                with open(os.path.join(sub_dir, f"obj_{j}.o"), "w") as f:
+                    f.write("x")
+                with open(os.path.join(tree, f"dir_{i}", f"top_{j}.o"), "w") as f:
+                    f.write("x")
+
+        try:
+            assert FileUtils.remove(tree, workers=4) is True
+            assert not os.path.exists(tree)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_remove_parallel_scans_on_pool(self):
+        # Test every directory of the tree is scanned on the pool, not on the calling thread
+        import threading
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        for i in range(4):
+            os.makedirs(os.path.join(temp_dir, f"dir_{i}", "nested"))
+            with open(os.path.join(temp_dir, f"dir_{i}", "nested", "obj.o"), "w") as f:
+                f.write("x")
+
+        scanned_by = []
+        scandir = os.scandir
+
+        def recording_scandir(path):
+            scanned_by.append(threading.current_thread())
+            return scandir(path)
+
+        try:
+            with unittest.mock.patch("os.scandir", side_effect=recording_scandir):
+                FileUtils._rmtree_parallel(temp_dir, 4)
+            assert not os.path.exists(temp_dir)
+            assert len(scanned_by) == 9
+            assert threading.main_thread() not in scanned_by
+        finally:
+            if os.path.exists(temp_dir):
+                FileUtils.remove(temp_dir)
+
+    def test_remove_parallel_exception(self):
+        # Test errors during parallel removal are raised
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(temp_dir, "sub"))
+        with open(os.path.join(temp_dir, "sub", "locked.txt"), "w") as f:
+            f.write("x")
+
+        try:
+            with unittest.mock.patch('os.unlink', side_effect=PermissionError("Permission denied")):
+                with pytest.raises(PermissionError):
+                    FileUtils.remove(temp_dir, workers=None)
+            assert os.path.exists(os.path.join(temp_dir, "sub", "locked.txt"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_remove_many(self):
+        # Test batch removal collects per-path errors instead of stopping
+        temp_dir = tempfile.mkdtemp()
+        paths = []
+        for i in range(4):
+            path = os.path.join(temp_dir, f"file_{i}.txt")
+            with open(path, "w") as f:
+                f.write("x")
+            paths.append(path)
+        sub_dir = os.path.join(temp_dir, "sub")
+        os.makedirs(sub_dir)
+        missing = os.path.join(temp_dir, "missing.txt")
+
+        try:
+            errors = FileUtils.remove_many([paths[0], missing, *paths[1:], sub_dir], workers=3)
+            assert list(errors) == [missing]
+            assert isinstance(errors[missing], FileNotFoundError)
+            assert os.listdir(temp_dir) == []
+            assert FileUtils.remove_many([]) == {}
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_scan_binary_types(self):
+        # Test PE, ELF and Mach-O headers are detected in one pass over a directory
+        import struct
+
+        temp_dir = tempfile.mkdtemp()
+        pe = bytearray(512)
+        pe[:2] = b"MZ"
+        struct.pack_into("<L", pe, 60, 128)
+        pe[128:134] = b"PE\0\0" + struct.pack("<H", 0x8664)
+        # PE header past the first header read
+        far_pe = bytearray(8192)
+        far_pe[:2] = b"MZ"
+        struct.pack_into("<L", far_pe, 60, 6000)
+        far_pe[6000:6006] = b"PE\0\0" + struct.pack("<H", 0x014C)
+        elf = b"\x7fELF\x02\x01\x01" + bytes(11) + struct.pack("<H", 0xB7) + bytes(44)
+        elf_be = b"\x7fELF\x01\x02\x01" + bytes(11) + struct.pack(">H", 0x08) + bytes(32)
+        macho = b"\xcf\xfa\xed\xfe" + struct.pack("<I", 0x01000007) + bytes(24)
+        fat = b"\xca\xfe\xba\xbe" + struct.pack(">I", 2)
+        fat += struct.pack(">I16x", 0x01000007) + struct.pack(">I16x", 0x0100000C)
+        java_class = b"\xca\xfe\xba\xbe" + struct.pack(">HH", 0, 61) + bytes(32)
+        files = {
+            "app.exe": bytes(pe),
+            "old.dll": bytes(far_pe),
+            "tool": elf,
+            "mips.so": elf_be,
+            "mac": macho,
+            "universal": fat,
+            "Main.class": java_class,
+            "notes.txt": b"MZ not really",
+        }
+        os.makedirs(os.path.join(temp_dir, "sub"))
+        for name, data in files.items():
+            with open(os.path.join(temp_dir, "sub" if name == "tool" else "", name), "wb") as f:
+                f.write(data)
+
+        try:
+            results = {r.path.name: r for r in FileUtils.scan_binary_types(temp_dir, workers=4)}
+            assert len(results) == len(files)
+            assert results["app.exe"][1:] == ("PE", "x86_64", 64, None)
+            assert results["old.dll"][1:] == ("PE", "x86", 32, None)
+            assert results["tool"][1:] == ("ELF", "arm64", 64, None)
+            assert results["mips.so"][1:] == ("ELF", "mips", 32, None)
+            assert results["mac"][1:] == ("Mach-O", "x86_64", 64, None)
+            assert results["universal"][1:] == ("Mach-O universal", "x86_64,arm64", None, None)
+            assert results["Main.class"].format is None
+            assert results["notes.txt"].format is None
+
+            # pattern and recursive narrow the scan, explicit paths are accepted too
+            assert [r.path.name for r in FileUtils.scan_binary_types(temp_dir, pattern="*.exe")] == ["app.exe"]
+            assert "tool" not in {r.path.name for r in FileUtils.scan_binary_types(temp_dir, recursive=False)}
+            missing = os.path.join(temp_dir, "missing")
+            (result,) = FileUtils.scan_binary_types([missing])
+            assert isinstance(result.error, FileNotFoundError)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_scan_binary_types_cache(self):
+        # Test a re-scan only reads the headers of files whose (inode, size, mtime) changed
+        import unittest.mock
+        from ddcUtils import file_utils
+
+        temp_dir = tempfile.mkdtemp()
+        cache_file = os.path.join(temp_dir, "cache", "binaries.json")
+        elf = b"\x7fELF\x02\x01\x01" + bytes(11) + b"\x3e\x00" + bytes(44)
+        for i in range(3):
+            with open(os.path.join(temp_dir, f"bin_{i}"), "wb") as f:
+                f.write(elf)
+
+        try:
+            paths = sorted(str(p) for p in Path(temp_dir).glob("bin_*"))
+            first = FileUtils.scan_binary_types(paths, cache_file=cache_file)
+            assert all(r.arch == "x86_64" for r in first)
+            assert os.path.isfile(cache_file)
+
+            with open(paths[1], "ab") as f:
+                f.write(b"\0")
+            read = unittest.mock.patch.object(FileUtils, "_read_binary_type", wraps=FileUtils._read_binary_type)
+            with read as mock_read:
+                FileUtils.scan_binary_types(paths)
+            assert [c.args[0] for c in mock_read.call_args_list] == [paths[1]]
+
+            # a new process starts from the saved cache
+            file_utils._binary_type_cache.clear()
+            with read as mock_read:
+                second = FileUtils.scan_binary_types(paths, cache_file=cache_file)
+            assert [c.args[0] for c in mock_read.call_args_list] == [paths[1]]
+            assert [r.arch for r in second] == ["x86_64"] * 3
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_find_older_than(self):
+        # Test the tree sweep yields only files past the cutoff
+        from datetime import datetime, timedelta
+
+        temp_dir = tempfile.mkdtemp()
+        old_time = (datetime.now() - timedelta(days=10)).timestamp()
+        os.makedirs(os.path.join(temp_dir, "sub", "deep"))
+        for name in ("old.log", "sub/old.log", "sub/deep/old.txt", "new.log"):
+            path = os.path.join(temp_dir, name)
+            with open(path, "w") as f:
+                f.write("x")
+            if name != "new.log":
+                os.utime(path, (old_time, old_time))
+
+        try:
+            found = {os.path.relpath(e.path, temp_dir) for e in FileUtils.find_older_than(temp_dir, 5)}
+            assert found == {"old.log", os.path.join("sub", "old.log"), os.path.join("sub", "deep", "old.txt")}
+            assert [e.name for e in FileUtils.find_older_than(temp_dir, 5, recursive=False)] == ["old.log"]
+            assert len(list(FileUtils.find_older_than(temp_dir, 5, pattern="*.txt"))) == 1
+            assert list(FileUtils.find_older_than(temp_dir, 30)) == []
+            assert list(FileUtils.find_older_than(temp_dir, 999999999)) == []
+            with pytest.raises(FileNotFoundError):
+                list(FileUtils.find_older_than(os.path.join(temp_dir, "missing"), 5))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_sweep_older_than(self):
+        # Test delete, gzip, move and custom actions run on every old file
+        import gzip
+        from datetime import datetime, timedelta
+
+        temp_dir = tempfile.mkdtemp()
+        old_time = (datetime.now() - timedelta(days=10)).timestamp()
+
+        def make_tree():
+            os.makedirs(os.path.join(temp_dir, "logs", "sub"), exist_ok=True)
+            for name in ("a.log", "b.log", "sub/c.log", "keep.log"):
+                path = os.path.join(temp_dir, "logs", name)
+                with open(path, "w") as f:
+                    f.write(name * 100)
+                if name != "keep.log":
+                    os.utime(path, (old_time, old_time))
+
+        logs_dir = os.path.join(temp_dir, "logs")
+        try:
+            make_tree()
+            assert FileUtils.sweep_older_than(logs_dir, 5, workers=2) == {}
+            assert sorted(os.listdir(logs_dir)) == ["keep.log", "sub"]
+            assert os.listdir(os.path.join(logs_dir, "sub")) == []
+
+            make_tree()
+            assert FileUtils.sweep_older_than(logs_dir, 5, action="gzip", workers=None) == {}
+            assert sorted(os.listdir(logs_dir)) == ["a.log.gz", "b.log.gz", "keep.log", "sub"]
+            with gzip.open(os.path.join(logs_dir, "sub", "c.log.gz"), "rt") as f:
+                assert f.read() == "sub/c.log" * 100
+            # archives are left alone on a second sweep
+            os.utime(os.path.join(logs_dir, "a.log.gz"), (old_time, old_time))
+            assert FileUtils.sweep_older_than(logs_dir, 5, action="gzip") == {}
+            assert os.path.isfile(os.path.join(logs_dir, "a.log.gz"))
+            FileUtils.remove(logs_dir)
+
+            # an archive name already taken is reported and the file is kept
+            make_tree()
+            for name in ("a.log", "a.txt"):
+                path = os.path.join(logs_dir, name)
+                with open(path, "w") as f:
+                    f.write(name)
+                os.utime(path, (old_time, old_time))
+            with open(os.path.join(logs_dir, "b.log.gz"), "wb") as f:
+                f.write(gzip.compress(b"older archive"))
+            errors = FileUtils.sweep_older_than(logs_dir, 5, action="gzip", pattern="*.*")
+            assert list(errors) == [os.path.join(logs_dir, "b.log")]
+            assert isinstance(errors[os.path.join(logs_dir, "b.log")], FileExistsError)
+            assert os.path.isfile(os.path.join(logs_dir, "b.log"))
+            with gzip.open(os.path.join(logs_dir, "b.log.gz"), "rb") as f:
+                assert f.read() == b"older archive"
+            for name in ("a.log", "a.txt"):
+                with gzip.open(os.path.join(logs_dir, f"{name}.gz"), "rt") as f:
+                    assert f.read() == name
+            FileUtils.remove(logs_dir)
+
+            # target_dir inside root is never swept again
+            make_tree()
+            archive_dir = os.path.join(logs_dir, "archive")
+            assert FileUtils.sweep_older_than(logs_dir, 5, action="move", target_dir=archive_dir) == {}
+            assert os.path.isfile(os.path.join(archive_dir, "sub", "c.log"))
+            assert os.stat(os.path.join(archive_dir, "a.log")).st_mtime == pytest.approx(old_time)
+            assert not os.path.exists(os.path.join(logs_dir, "a.log"))
+
+            seen = []
+
+            def fail_on_b(path):
+                seen.append(os.path.basename(path))
+                if path.endswith("b.log"):
+                    raise PermissionError("Permission denied")
+
+            make_tree()
+            errors = FileUtils.sweep_older_than(logs_dir, 5, action=fail_on_b, target_dir=archive_dir, workers=3)
+            assert list(errors) == [os.path.join(logs_dir, "b.log")]
+            assert sorted(seen) == ["a.log", "b.log", "c.log"]
+
+            with pytest.raises(ValueError):
+                FileUtils.sweep_older_than(logs_dir, 5, action="move")
+            with pytest.raises(ValueError):
+                FileUtils.sweep_older_than(logs_dir, 5, action="shred")
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_rotate_logs(self):
+        # Test age, size and count selection, archive naming and source removal
+        import gzip
+        from datetime import datetime, timedelta
+
+        temp_dir = tempfile.mkdtemp()
+        now = datetime.now()
+
+        def write_log(name, size, days_old):
+            path = os.path.join(temp_dir, name)
+            with open(path, "w") as f:
+                f.write("x" * size)
+            stamp = (now - timedelta(days=days_old)).timestamp()
+            os.utime(path, (stamp, stamp))
+            return path
+
+        try:
+            write_log("old.log", 100, 10)
+            write_log("big.log", 5000, 0)
+            write_log("small.log", 100, 0)
+            write_log("notes.txt", 100, 10)
+
+            result = FileUtils.rotate_logs(temp_dir, max_age_days=5, max_size=1000, workers=2)
+            rotated = {r.input_file.name: r for r in result.rotated}
+            assert set(rotated) == {"old.log", "big.log"}
+            assert all(r.removed and r.error is None for r in result.rotated)
+            assert result.bytes_in == 5100
+            assert result.bytes_out == sum(r.bytes_out for r in result.rotated)
+            assert result.throughput > 0
+            archive = rotated["big.log"].output_file
+            assert archive.name.startswith("big.log.") and archive.name.endswith(".gz")
+            with gzip.open(archive, "rt") as f:
+                assert f.read() == "x" * 5000
+            assert sorted(os.listdir(temp_dir)) == sorted(
+                ["notes.txt", "small.log", archive.name, rotated["old.log"].output_file.name]
+            )
+
+            # keep retains the newest logs, nothing matches any more without criteria changes
+            assert FileUtils.rotate_logs(temp_dir, max_age_days=5).rotated == []
+            write_log("a.log", 10, 3)
+            write_log("b.log", 10, 2)
+            result = FileUtils.rotate_logs(temp_dir, keep=2)
+            assert [r.input_file.name for r in result.rotated] == ["a.log"]
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_rotate_logs_keep_archives(self):
+        # Test same-second rotations get unique names and old archives are pruned per log
+        from datetime import datetime
+
+        stamp = datetime.fromtimestamp(1700000000).strftime("%Y%m%d-%H%M%S")
+        temp_dir = tempfile.mkdtemp()
+        archive_dir = os.path.join(temp_dir, "archive")
+        log_file = os.path.join(temp_dir, "app.log")
+
+        try:
+            names = []
+            for i in range(4):
+                with open(log_file, "w") as f:
+                    f.write(f"run {i}")
+                os.utime(log_file, (1700000000, 1700000000))
+                result = FileUtils.rotate_logs(temp_dir, output_dir=archive_dir, keep_archives=3, workers=1)
+                names.append(result.rotated[0].output_file.name)
+            assert names[0] == f"app.log.{stamp}.gz"
+            assert names[3] == f"app.log.{stamp}-3.gz"
+            assert [p.name for p in result.removed_archives] == [names[0]]
+            assert sorted(os.listdir(archive_dir)) == sorted(names[1:])
+            assert not os.path.exists(log_file)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_rotate_task_keeps_source_on_failure(self):
+        # Test a log is never removed when its archive fails verification
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        log_file = os.path.join(temp_dir, "app.log")
+        archive = os.path.join(temp_dir, "app.log.gz")
+        with open(log_file, "w") as f:
+            f.write("important")
+
+        try:
+            with unittest.mock.patch.object(FileUtils, "_gzip_verify", return_value=False):
+                result = FileUtils._rotate_task(log_file, archive, 6)
+            assert result.removed is False and result.output_file is None
+            assert isinstance(result.error, OSError)
+            assert os.listdir(temp_dir) == ["app.log"]
+
+            # an existing archive is never overwritten
+            with open(archive, "wb") as f:
+                f.write(b"previous")
+            result = FileUtils._rotate_task(log_file, archive, 6)
+            assert isinstance(result.error, FileExistsError)
+            with open(archive, "rb") as f:
+                assert f.read() == b"previous"
+            assert os.path.isfile(log_file)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_hash_file(self):
+        # Test digests match hashlib for several algorithms and buffer sizes
+        import hashlib
+
+        temp_dir = tempfile.mkdtemp()
+        data = os.urandom(300_000)
+        file_path = os.path.join(temp_dir, "artifact.bin")
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+        try:
+            assert FileUtils.hash_file(file_path) == hashlib.sha256(data).hexdigest()
+            assert FileUtils.hash_file(file_path, "md5", chunk_size=4096) == hashlib.md5(data).hexdigest()
+            assert FileUtils.hash_file(file_path, "blake2b") == hashlib.blake2b(data).hexdigest()
+            assert FileUtils.hash_file(file_path, "shake_256") == hashlib.shake_256(data).hexdigest(32)
+            with pytest.raises(ValueError):
+                FileUtils.hash_file(file_path, "nope")
+            with pytest.raises(FileNotFoundError):
+                FileUtils.hash_file(os.path.join(temp_dir, "missing.bin"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_hash_many(self):
+        # Test parallel hashing keeps order, reports errors and reuses the persistent cache
+        import hashlib
+        import time
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        cache_file = os.path.join(temp_dir, "cache", "hashes.json")
+        paths = []
+        old_time = time.time() - 3600
+        for i in range(6):
+            path = os.path.join(temp_dir, f"file_{i}.bin")
+            with open(path, "wb") as f:
+                f.write(bytes([i]) * (i * 1000))
+            os.utime(path, (old_time, old_time))
+            paths.append(path)
+        missing = os.path.join(temp_dir, "missing.bin")
+
+        try:
+            results = FileUtils.hash_many([*paths, missing], workers=3, cache_file=cache_file)
+            assert [r.path for r in results] == [Path(p) for p in [*paths, missing]]
+            for i, r in enumerate(results[:-1]):
+                assert r.digest == hashlib.sha256(bytes([i]) * (i * 1000)).hexdigest()
+                assert r.size == i * 1000 and r.cached is False and r.error is None
+            assert isinstance(results[-1].error, FileNotFoundError)
+            assert FileUtils.hash_many([]) == []
+            with pytest.raises(ValueError):
+                FileUtils.hash_many(paths, "nope")
+
+            with open(paths[2], "ab") as f:
+                f.write(b"changed")
+            os.utime(paths[2], (old_time + 1, old_time + 1))
+            with unittest.mock.patch.object(FileUtils, "hash_file", wraps=FileUtils.hash_file) as mock_hash:
+                results = FileUtils.hash_many(paths, cache_file=cache_file)
+                assert [c.args[0] for c in mock_hash.call_args_list] == [paths[2]]
+                assert [r.cached for r in results] == [True, True, False, True, True, True]
+                assert results[2].digest == hashlib.sha256(bytes([2]) * 2000 + b"changed").hexdigest()
+
+                # another algorithm is hashed once and kept next to the first
+                mock_hash.reset_mock()
+                FileUtils.hash_many(paths[:2], "md5", cache_file=cache_file)
+                FileUtils.hash_many(paths[:2], "md5", cache_file=cache_file)
+                assert mock_hash.call_count == 2
+                assert all(r.cached for r in FileUtils.hash_many(paths[:2], cache_file=cache_file))
+
+            # files modified just now are not cached, their mtime may not move on the next write
+            fresh = os.path.join(temp_dir, "fresh.bin")
+            with open(fresh, "wb") as f:
+                f.write(b"fresh")
+            FileUtils.hash_many([fresh], cache_file=cache_file)
+            assert FileUtils.hash_many([fresh], cache_file=cache_file)[0].cached is False
+
+            # a hash outlasting the window does not make a file fresh at its stat cacheable
+            def slow_hash(*args):
+                time.sleep(0.3)
+                return hash_file(*args)
+
+            hash_file = FileUtils.hash_file
+            with open(fresh, "ab") as f:
+                f.write(b" again")
+            with unittest.mock.patch.object(constants, "RACY_WINDOW_NS", 200_000_000):
+                with unittest.mock.patch.object(FileUtils, "hash_file", side_effect=slow_hash):
+                    FileUtils.hash_many([fresh], cache_file=cache_file)
+            assert FileUtils.hash_many([fresh], cache_file=cache_file)[0].cached is False
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_find_duplicates(self):
+        # Test size, partial and full hash stages only report identical files
+        import hashlib
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        other_dir = tempfile.mkdtemp()
+        big = os.urandom(200_000)
+        # same size, same first and last block, different middle
+        big_variant = big[:100_000] + b"\0" + big[100_001:]
+        files = {
+            os.path.join(temp_dir, "a.bin"): big,
+            os.path.join(temp_dir, "sub", "b.bin"): big,
+            os.path.join(other_dir, "c.bin"): big,
+            os.path.join(temp_dir, "variant.bin"): big_variant,
+            os.path.join(temp_dir, "small_1.txt"): b"same",
+            os.path.join(temp_dir, "small_2.txt"): b"same",
+            os.path.join(temp_dir, "small_3.txt"): b"diff",
+            os.path.join(temp_dir, "unique.txt"): b"unique content",
+            os.path.join(temp_dir, "empty_1.txt"): b"",
+            os.path.join(temp_dir, "empty_2.txt"): b"",
+        }
+        os.makedirs(os.path.join(temp_dir, "sub"))
+        for path, data in files.items():
+            with open(path, "wb") as f:
+                f.write(data)
+        # an existing hardlink is the same file, not a duplicate
+        os.link(os.path.join(temp_dir, "small_3.txt"), os.path.join(temp_dir, "small_3_link.txt"))
+
+        try:
+            with unittest.mock.patch.object(FileUtils, "hash_file", wraps=FileUtils.hash_file) as mock_hash:
+                groups = list(FileUtils.find_duplicates([temp_dir, other_dir], workers=4))
+            assert [g.size for g in groups] == [200_000, 4]
+            assert groups[0].paths == sorted(Path(p) for p, d in files.items() if d == big)
+            assert groups[0].digest == hashlib.sha256(big).hexdigest()
+            assert groups[1].paths == [Path(temp_dir, "small_1.txt"), Path(temp_dir, "small_2.txt")]
+            assert groups[1].digest == hashlib.sha256(b"same").hexdigest()
+            # small files are hashed once, big ones once more after the partial hash
+            hashed = sorted(os.path.basename(c.args[0]) for c in mock_hash.call_args_list)
+            assert hashed == ["a.bin", "b.bin", "c.bin", "small_1.txt", "small_2.txt", "small_3.txt", "variant.bin"]
+
+            assert [g.size for g in FileUtils.find_duplicates(temp_dir, recursive=False)] == [4]
+            assert [g.size for g in FileUtils.find_duplicates(temp_dir, pattern="*.bin")] == [200_000]
+            assert len(list(FileUtils.find_duplicates(temp_dir, min_size=0))) == 3
+        finally:
+            FileUtils.remove(temp_dir)
+            FileUtils.remove(other_dir)
+
+    def test_find_duplicates_hardlink(self):
+        # Test duplicates are replaced by hardlinks and changed files are left alone
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        paths = [os.path.join(temp_dir, f"copy_{i}.bin") for i in range(3)]
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(b"payload" * 1000)
+
+        try:
+            (group,) = FileUtils.find_duplicates(temp_dir, hardlink=True)
+            assert group.errors == {}
+            inodes = {os.stat(p).st_ino for p in paths}
+            assert len(inodes) == 1
+            assert os.stat(paths[0]).st_nlink == 3
+            assert sorted(os.listdir(temp_dir)) == ["copy_0.bin", "copy_1.bin", "copy_2.bin"]
+            assert list(FileUtils.find_duplicates(temp_dir)) == []
+
+            extra = os.path.join(temp_dir, "extra.bin")
+            with open(extra, "wb") as f:
+                f.write(b"payload" * 1000)
+            with unittest.mock.patch("os.link", side_effect=PermissionError("Permission denied")):
+                (group,) = FileUtils.find_duplicates(temp_dir, hardlink=True)
+            assert list(group.errors) == [extra]
+            assert os.stat(extra).st_nlink == 1
+
+            # a kept file written to after hashing is never linked over its duplicates
+            keep_st, extra_st = os.stat(paths[0]), os.stat(extra)
+            with open(paths[0], "ab") as f:
+                f.write(b"changed")
+            with pytest.raises(OSError):
+                FileUtils._hardlink_duplicate(paths[0], keep_st, extra, extra_st)
+            assert os.stat(extra).st_nlink == 1
+            with open(extra, "rb") as f:
+                assert f.read() == b"payload" * 1000
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_zip_dir(self):
+        # Test the archive round-trips through zipfile with store and deflate rules applied
+        import zipfile
+
+        temp_dir = tempfile.mkdtemp()
+        source_dir = os.path.join(temp_dir, "source")
+        os.makedirs(os.path.join(source_dir, "sub", "empty"))
+        files = {
+            "a.txt": b"hello world " * 5000,
+            "sub/b.log": os.urandom(300_000),
+            "sub/photo.JPG": b"jpeg data " * 1000,
+            "sub/archive.gz": b"gzip data " * 1000,
+            "empty.txt": b"",
+            "ünïcode.txt": b"unicode name",
+        }
+        for name, data in files.items():
+            with open(os.path.join(source_dir, name), "wb") as f:
+                f.write(data)
+
+        try:
+            output_file = FileUtils.zip_dir(source_dir, workers=3)
+            assert output_file == Path(temp_dir, "source.zip")
+            with zipfile.ZipFile(output_file) as zf:
+                assert zf.testzip() is None
+                infos = {i.filename: i for i in zf.infolist()}
+                assert set(infos) == {*files, "sub/", "sub/empty/"}
+                for name, data in files.items():
+                    assert zf.read(name) == data
+                assert infos["a.txt"].compress_type == zipfile.ZIP_DEFLATED
+                assert infos["a.txt"].compress_size < len(files["a.txt"])
+                assert infos["sub/photo.JPG"].compress_type == zipfile.ZIP_STORED
+                assert infos["sub/archive.gz"].compress_type == zipfile.ZIP_STORED
+                assert infos["empty.txt"].compress_type == zipfile.ZIP_STORED
+                assert infos["sub/empty/"].is_dir()
+
+            # the members extract with the existing unzip
+            out_dir = os.path.join(temp_dir, "out")
+            FileUtils.unzip(str(output_file), out_dir)
+            with open(os.path.join(out_dir, "sub", "b.log"), "rb") as f:
+                assert f.read() == files["sub/b.log"]
+
+            # an archive inside the source is never added to itself, custom rules store everything
+            inner = FileUtils.zip_dir(
+                source_dir, os.path.join(source_dir, "self.zip"), store_extensions=[".txt", ".log"]
+            )
+            with zipfile.ZipFile(inner) as zf:
+                assert "self.zip" not in zf.namelist()
+                assert zf.getinfo("a.txt").compress_type == zipfile.ZIP_STORED
+                assert zf.getinfo("sub/b.log").compress_type == zipfile.ZIP_STORED
+
+            with pytest.raises(FileNotFoundError):
+                FileUtils.zip_dir(os.path.join(temp_dir, "missing"))
+            assert not os.path.exists(os.path.join(temp_dir, "missing.zip"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_zip_dir_zip64(self):
+        # Test ZIP64 records are written once the limits are crossed
+        import unittest.mock
+        import zipfile
+
+        temp_dir = tempfile.mkdtemp()
+        source_dir = os.path.join(temp_dir, "source")
+        os.makedirs(source_dir)
+        for i in range(5):
+            with open(os.path.join(source_dir, f"file_{i}.bin"), "wb") as f:
+                f.write(bytes([i]) * 2000)
+
+        try:
+            with unittest.mock.patch.multiple(zipfile, ZIP64_LIMIT=1000, ZIP_FILECOUNT_LIMIT=3):
+                output_file = FileUtils.zip_dir(source_dir)
+            with open(output_file, "rb") as f:
+                data = f.read()
+            assert b"PK\x06\x06" in data and b"PK\x06\x07" in data
+            with zipfile.ZipFile(output_file) as zf:
+                assert len(zf.infolist()) == 5
+                for i in range(5):
+                    assert zf.read(f"file_{i}.bin") == bytes([i]) * 2000
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_compress_codecs(self):
+        # Test every registered codec round-trips, single-stream and parallel, on files and in memory
+        import bz2
+        import gzip
+        import io
+        import lzma
+
+        temp_dir = tempfile.mkdtemp()
+        data = b"line of sample log data\n" * 20000 + os.urandom(5000)
+        input_file = os.path.join(temp_dir, "sample.log")
+        with open(input_file, "wb") as f:
+            f.write(data)
+
+        try:
+            assert {"gzip", "bz2", "lzma"} <= set(FileUtils.list_codecs())
+            for name in FileUtils.list_codecs():
+                codec = FileUtils.get_codec(name)
+                for workers in (1, 3):
+                    output_file = FileUtils.compress(input_file, codec=name, workers=workers, block_size=64 * 1024)
+                    assert output_file == Path(temp_dir, f"sample.log{codec.extension}")
+                    assert os.path.getsize(output_file) < len(data)
+                    os.remove(input_file)
+                    assert FileUtils.decompress(str(output_file)) == Path(input_file)
+                    with open(input_file, "rb") as f:
+                        assert f.read() == data
+                    os.remove(output_file)
+
+                compressed = FileUtils.compress(data, codec=name, compresslevel=1, workers=2, block_size=100_000)
+                assert compressed.startswith(codec.magic)
+                assert FileUtils.decompress(compressed) == data
+                assert FileUtils.decompress(io.BytesIO(compressed), codec=name) == data
+
+            # members written in parallel are readable by the standard modules
+            assert gzip.decompress(FileUtils.compress(data, workers=4, block_size=50_000)) == data
+            assert bz2.decompress(FileUtils.compress(data, codec="bz2", workers=4, block_size=50_000)) == data
+            assert lzma.decompress(FileUtils.compress(data, codec="lzma", workers=4, block_size=50_000)) == data
+            assert gzip.decompress(FileUtils.compress(b"")) == b""
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_compress_codec_registry(self):
+        # Test unknown codecs and formats are rejected and custom codecs can be registered
+        import lzma
+        import zlib
+        from ddcUtils import Codec, file_utils
+
+        temp_dir = tempfile.mkdtemp()
+        bad_file = os.path.join(temp_dir, "bad.xz")
+        with open(bad_file, "wb") as f:
+            f.write(b"\xfd7zXZ\x00 truncated")
+
+        try:
+            with pytest.raises(ValueError):
+                FileUtils.get_codec("nope")
+            with pytest.raises(ValueError):
+                FileUtils.compress(b"data", codec="nope")
+            with pytest.raises(ValueError):
+                FileUtils.decompress(b"plain text")
+            with pytest.raises((EOFError, lzma.LZMAError)):
+                FileUtils.decompress(bad_file)
+            assert os.listdir(temp_dir) == ["bad.xz"]
+
+            class Inflater:
+                def __init__(self, fileobj):
+                    self.data = zlib.decompress(fileobj.read())
+                    self.offset = 0
+
+                def read(self, size=-1):
+                    chunk = self.data[self.offset : self.offset + size if size >= 0 else None]
+                    self.offset += len(chunk)
+                    return chunk
+
+                def __enter__(self):
+                    return self
+
+                def __exit__(self, *args):
+                    pass
+
+            codec = Codec("zlib", ".zz", b"\x78", 6, zlib.compress, zlib.compressobj, Inflater)
+            FileUtils.register_codec(codec)
+            try:
+                compressed = FileUtils.compress(b"custom" * 100, codec="zlib")
+                assert zlib.decompress(compressed) == b"custom" * 100
+                assert FileUtils.decompress(compressed) == b"custom" * 100
+            finally:
+                file_utils._codecs.pop("zlib")
+            assert "zlib" not in FileUtils.list_codecs()
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_snapshot_and_diff(self):
+        # Test the parallel scan, the on-disk index and added/removed/modified detection
+        import hashlib
+
+        temp_dir = tempfile.mkdtemp()
+        root = os.path.join(temp_dir, "tree")
+        os.makedirs(os.path.join(root, "a", "b"))
+        os.makedirs(os.path.join(root, ".git"))
+        for name in ("top.txt", "a/one.txt", "a/b/two.txt", ".git/HEAD"):
+            with open(os.path.join(root, name), "w") as f:
+                f.write(name)
+
+        try:
+            snapshot = FileUtils.snapshot(root, workers=4, prune_dirs=".git")
+            assert list(snapshot) == ["a/b/two.txt", "a/one.txt", "top.txt"]
+            st = os.stat(os.path.join(root, "top.txt"))
+            assert snapshot["top.txt"] == (st.st_size, st.st_mtime_ns, st.st_ino, None)
+
+            hashed = FileUtils.snapshot(root, hash_algorithm="sha256", prune_dirs=".git")
+            assert hashed["a/one.txt"].digest == "sha256:" + hashlib.sha256(b"a/one.txt").hexdigest()
+
+            index = os.path.join(temp_dir, "index", "tree.snap")
+            assert FileUtils.save_snapshot(hashed, index) == Path(index)
+            assert FileUtils.load_snapshot(index) == hashed
+
+            with open(os.path.join(root, "a", "one.txt"), "a") as f:
+                f.write(" changed")
+            os.remove(os.path.join(root, "a", "b", "two.txt"))
+            with open(os.path.join(root, "a", "new.txt"), "w") as f:
+                f.write("new")
+            # a touch without a content change is not a modification when hashes are kept
+            os.utime(os.path.join(root, "top.txt"), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+            diff = FileUtils.diff_snapshots(hashed, FileUtils.snapshot(root, "sha256", prune_dirs=".git"))
+            assert diff == (["a/new.txt"], ["a/b/two.txt"], ["a/one.txt"])
+            diff = FileUtils.diff_snapshots(snapshot, FileUtils.snapshot(root, prune_dirs=".git"))
+            assert diff == (["a/new.txt"], ["a/b/two.txt"], ["a/one.txt", "top.txt"])
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_diff_tree(self):
+        # Test successive runs only report what changed since the previous run and reuse digests
+        import unittest.mock
+
+        temp_dir = tempfile.mkdtemp()
+        root = os.path.join(temp_dir, "tree")
+        index = os.path.join(temp_dir, "tree.snap")
+        os.makedirs(root)
+        for i in range(3):
+            with open(os.path.join(root, f"file_{i}.txt"), "w") as f:
+                f.write(str(i))
+
+        try:
+            assert FileUtils.diff_tree(root, index, "sha256") == (["file_0.txt", "file_1.txt", "file_2.txt"], [], [])
+            with unittest.mock.patch.object(FileUtils, "hash_file", wraps=FileUtils.hash_file) as mock_hash:
+                assert FileUtils.diff_tree(root, index, "sha256") == ([], [], [])
+                assert mock_hash.call_count == 0
+                with open(os.path.join(root, "file_1.txt"), "w") as f:
+                    f.write("changed")
+                assert FileUtils.diff_tree(root, index, "sha256", update=False) == ([], [], ["file_1.txt"])
+                assert FileUtils.diff_tree(root, index, "sha256") == ([], [], ["file_1.txt"])
+                assert FileUtils.diff_tree(root, index, "sha256") == ([], [], [])
+                assert [os.path.basename(c.args[0]) for c in mock_hash.call_args_list] == ["file_1.txt"] * 2
+                # digests of another algorithm are never reused
+                FileUtils.diff_tree(root, index, "md5")
+                assert mock_hash.call_count == 5
+
+            with open(index, "wb") as f:
+                f.write(b"not a snapshot")
+            with pytest.raises(OSError):
+                FileUtils.diff_tree(root, index)
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_directory_watcher(self):
+        # Test created, modified and deleted events, including whole subtrees
+        from ddcUtils import DirectoryWatcher
+
+        temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(temp_dir, "sub"))
+        existing = os.path.join(temp_dir, "sub", "existing.txt")
+        with open(existing, "w") as f:
+            f.write("x")
+
+        try:
+            watcher = DirectoryWatcher(temp_dir, interval=0.01)
+            assert watcher.poll() == []
+
+            created = os.path.join(temp_dir, "sub", "new.txt")
+            with open(created, "w") as f:
+                f.write("new")
+            os.makedirs(os.path.join(temp_dir, "deep", "er"))
+            with open(os.path.join(temp_dir, "deep", "er", "file.txt"), "w") as f:
+                f.write("deep")
+            events = watcher.poll()
+            assert sorted(events) == sorted(
+                [
+                    ("created", Path(created)),
+                    ("created", Path(temp_dir, "deep", "er", "file.txt")),
+                ]
+            )
+
+            with open(existing, "a") as f:
+                f.write("more")
+            assert watcher.poll() == [("modified", Path(existing))]
+            assert watcher.poll() == []
+
+            FileUtils.remove(os.path.join(temp_dir, "deep"))
+            os.remove(created)
+            events = watcher.poll()
+            assert sorted(events) == sorted(
+                [("deleted", Path(created)), ("deleted", Path(temp_dir, "deep", "er", "file.txt"))]
+            )
+
+            with pytest.raises(FileNotFoundError):
+                DirectoryWatcher(os.path.join(temp_dir, "missing"))
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_directory_watcher_only_rescans_changed_dirs(self):
+        # Test directories whose mtime did not move are never read again
+        import time
+        import unittest.mock
+        from ddcUtils import DirectoryWatcher
+
+        temp_dir = tempfile.mkdtemp()
+        old_time = time.time() - 3600
+        for i in range(3):
+            sub_dir = os.path.join(temp_dir, f"dir_{i}")
+            os.makedirs(sub_dir)
+            with open(os.path.join(sub_dir, "file.txt"), "w") as f:
+                f.write("x")
+            os.utime(sub_dir, (old_time, old_time))
+        os.utime(temp_dir, (old_time, old_time))
+
+        # utime moves ctime to now, which would otherwise keep every directory in the racy window
+        racy_window = unittest.mock.patch.object(constants, "RACY_WINDOW_NS", 0)
+        try:
+            with racy_window:
+                watcher = DirectoryWatcher(temp_dir, pattern="*.txt")
+            with open(os.path.join(temp_dir, "dir_1", "other.log"), "w") as f:
+                f.write("ignored by pattern")
+            with open(os.path.join(temp_dir, "dir_1", "added.txt"), "w") as f:
+                f.write("y")
+            with unittest.mock.patch("os.scandir", wraps=os.scandir) as mock_scandir:
+                events = watcher.poll()
+            assert events == [("created", Path(temp_dir, "dir_1", "added.txt"))]
+            assert [c.args[0] for c in mock_scandir.call_args_list] == [os.path.join(temp_dir, "dir_1")]
+
+            with unittest.mock.patch("os.scandir", wraps=os.scandir) as mock_scandir:
+                watcher = DirectoryWatcher(temp_dir, recursive=False)
+                assert mock_scandir.call_count == 1
+        finally:
+            FileUtils.remove(temp_dir)
+
+    def test_watch_iterator_and_callback(self):
+        # Test events are delivered through the iterator and run() until stop() is called
+        import threading
+        from ddcUtils import DirectoryWatcher
+
+        temp_dir = tempfile.mkdtemp()
+        target = os.path.join(temp_dir, "incoming.csv")
+
+        try:
+            watcher = DirectoryWatcher(temp_dir, interval=0.01)
+            received = []
+
+            def on_event(event):
+                received.append(event)
+                watcher.stop()
+
+            thread = threading.Thread(target=watcher.run, args=(on_event,))
+            thread.start()
+            with open(target, "w") as f:
+                f.write("a,b")
+            thread.join(5)
+            assert not thread.is_alive()
+            assert received == [("created", Path(target))]
+
+            events = FileUtils.watch(temp_dir, interval=0.01)
+            os.remove(target)
+            assert next(events) == ("deleted", Path(target))
+            events.close()
+        finally:
+            watcher.stop()
+            FileUtils.remove(temp_dir)
@@ -0,0 +1,382 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from ddcUtils import FileUtils, RateLimiter
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for a file server that understands HEAD and single Range requests
+    """
+
+    files = {}
+    delays = {}
+    accept_ranges = True
+    validators = False
+    # path -> number of upcoming GETs that drop the connection halfway or answer 503
+    drops = {}
+    errors = {}
+    requests_seen = []
+    statuses = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_headers(self, status, length, extra=None):
+        self.statuses.append(status)
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        if self.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.requests_seen.append(("HEAD", self.path, None))
+        if self.path not in self.files:
+            self._send_headers(404, 0)
+            return
+        self._send_headers(200, len(self.files[self.path]))
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(self.delays.get(self.path, 0))
+            self._get()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _get(self):
+        range_header = self.headers.get("Range")
+        self.requests_seen.append(("GET", self.path, range_header))
+        if self.path not in self.files:
+            self._send_headers(404, 0)
+            return
+        if self.errors.get(self.path):
+            self.errors[self.path] -= 1
+            self._send_headers(503, 0)
+            return
+        data = self.files[self.path]
+        extra = {}
+        if self.validators:
+            extra = {"ETag": f'"{hashlib.md5(data).hexdigest()}"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+            if self.headers.get("If-None-Match") == extra["ETag"]:
+                self._send_headers(304, 0, extra)
+                return
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "") if self.accept_ranges else None
+        if not match:
+            self._send_headers(200, len(data), extra)
+            self._write_body(data)
+            return
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(data) - 1
+        if start >= len(data):
+            self._send_headers(416, 0, {"Content-Range": f"bytes */{len(data)}"})
+            return
+        end = min(end, len(data) - 1)
+        extra["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        self._send_headers(206, end - start + 1, extra)
+        self._write_body(data[start : end + 1])
+
+    def _write_body(self, body):
+        if self.drops.get(self.path):
+            self.drops[self.path] -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class TestFileUtilsDownload:
+    @classmethod
+    def setup_class(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.payload = os.urandom(200 * 1024)
+        RangeRequestHandler.files = {"/artifact.bin": cls.payload, "/small.txt": b"small"}
+
+    @classmethod
+    def teardown_class(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setup_method(self):
+        RangeRequestHandler.accept_ranges = True
+        RangeRequestHandler.requests_seen = []
+        RangeRequestHandler.statuses = []
+        RangeRequestHandler.validators = False
+        RangeRequestHandler.drops = {}
+        RangeRequestHandler.errors = {}
+        RangeRequestHandler.delays = {}
+        RangeRequestHandler.max_active = 0
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        FileUtils.remove(self.temp_dir)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_download_file_shared_session(self):
+        # Test downloads reuse the pooled session and honour chunk_size
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, chunk_size=4096) is True
+        assert self._read(dst_file) == self.payload
+        assert FileUtils._get_session() is FileUtils._get_session()
+
+    def test_download_file_resume(self):
+        # Test a partial file is completed with a Range request
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        with open(dst_file, "wb") as f:
+            f.write(self.payload[:50000])
+
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, resume=True) is True
+        assert self._read(dst_file) == self.payload
+        assert RangeRequestHandler.requests_seen[-1] == ("GET", "/artifact.bin", "bytes=50000-")
+
+        # an already complete file gets 416 and is left alone
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, resume=True) is True
+        assert self._read(dst_file) == self.payload
+
+    def test_download_file_resume_without_range_support(self):
+        # Test the file is rewritten when the server ignores Range
+        RangeRequestHandler.accept_ranges = False
+        dst_file = os.path.join(self.temp_dir, "small.txt")
+        with open(dst_file, "wb") as f:
+            f.write(b"sm")
+
+        assert FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, resume=True) is True
+        assert self._read(dst_file) == b"small"
+
+    def test_download_file_resume_larger_local_file(self):
+        # Test a local file bigger than the remote one is an error, not a completed download
+        dst_file = os.path.join(self.temp_dir, "small.txt")
+        with open(dst_file, "wb") as f:
+            f.write(b"much bigger than remote")
+
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, resume=True)
+
+    def test_download_file_segmented(self):
+        # Test byte ranges are fetched concurrently and reassembled in place
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, segments=4) is True
+        assert self._read(dst_file) == self.payload
+        ranges = sorted(r for m, p, r in RangeRequestHandler.requests_seen if m == "GET")
+        assert len(ranges) == 4
+        assert "bytes=0-51199" in ranges
+
+    def test_download_file_segmented_fallback(self):
+        # Test segmented mode falls back to a single stream without range support
+        RangeRequestHandler.accept_ranges = False
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, segments=4) is True
+        assert self._read(dst_file) == self.payload
+        assert [m for m, p, r in RangeRequestHandler.requests_seen] == ["HEAD", "GET"]
+
+    def test_download_file_not_found(self):
+        # Test HTTP errors are raised
+        dst_file = os.path.join(self.temp_dir, "missing.bin")
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/missing.bin", dst_file)
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/missing.bin", dst_file, segments=2)
+
+    def test_download_many(self):
+        # Test batch downloads run concurrently and report per-item results
+        RangeRequestHandler.delays = {"/slow.txt": 0.5}
+        RangeRequestHandler.files["/slow.txt"] = b"slow"
+        downloads = [(f"{self.base_url}/slow.txt", os.path.join(self.temp_dir, "slow.txt"))]
+        downloads += [(f"{self.base_url}/small.txt", os.path.join(self.temp_dir, f"small_{i}.txt")) for i in range(6)]
+        downloads.append((f"{self.base_url}/missing.bin", os.path.join(self.temp_dir, "missing.bin")))
+
+        start = time.perf_counter()
+        results = FileUtils.download_many(downloads, workers=4, chunk_size=1024)
+        assert time.perf_counter() - start < 2
+        assert [r.url for r in results] == [url for url, path in downloads]
+        assert results[0].size == 4 and results[0].duration >= 0.5
+        for result in results[1:7]:
+            assert result.error is None
+            assert result.size == 5
+            assert self._read(result.path) == b"small"
+            # the slow url never held up the others
+            assert result.duration < 0.5
+        assert isinstance(results[7].error, requests.HTTPError)
+        assert FileUtils.download_many([]) == []
+
+    def test_download_many_per_host_limit(self):
+        # Test the per-host connection limit caps concurrency to one host
+        RangeRequestHandler.delays = {"/small.txt": 0.05}
+        downloads = [(f"{self.base_url}/small.txt", os.path.join(self.temp_dir, f"small_{i}.txt")) for i in range(8)]
+
+        results = FileUtils.download_many(downloads, workers=8, per_host=2)
+        assert all(r.error is None for r in results)
+        assert RangeRequestHandler.max_active <= 2
+
+    def test_download_many_per_host_scheduling(self):
+        # Test a saturated host never parks the workers other hosts could use
+        RangeRequestHandler.delays = {"/slow.txt": 0.3}
+        RangeRequestHandler.files["/slow.txt"] = b"slow"
+        downloads = [(f"{self.base_url}/slow.txt", os.path.join(self.temp_dir, f"slow_{i}.txt")) for i in range(3)]
+        other_host = self.base_url.replace("127.0.0.1", "localhost")
+        downloads.append((f"{other_host}/small.txt", os.path.join(self.temp_dir, "small.txt")))
+
+        start = time.perf_counter()
+        results = FileUtils.download_many(downloads, workers=4, per_host=1)
+        assert time.perf_counter() - start >= 0.9
+        assert all(r.error is None for r in results)
+        assert [r.url for r in results] == [url for url, path in downloads]
+        # queued downloads are not charged for the wait on their host slot
+        assert all(0.3 <= r.duration < 0.6 for r in results[:3])
+        assert results[3].duration < 0.3
+        assert RangeRequestHandler.max_active <= 2
+
+    def test_download_file_conditional_cache(self):
+        # Test unchanged files are answered with 304 and not transferred again
+        RangeRequestHandler.validators = True
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        url = f"{self.base_url}/artifact.bin"
+
+        assert FileUtils.download_file(url, dst_file, cache_dir=cache_dir) is True
+        assert RangeRequestHandler.statuses == [200]
+        assert FileUtils.download_file(url, dst_file, cache_dir=cache_dir) is True
+        assert RangeRequestHandler.statuses == [200, 304]
+        assert self._read(dst_file) == self.payload
+
+        # a local file that no longer matches the cached size is fetched in full
+        with open(dst_file, "wb") as f:
+            f.write(b"truncated")
+        assert FileUtils.download_file(url, dst_file, cache_dir=cache_dir) is True
+        assert RangeRequestHandler.statuses[-1] == 200
+        assert self._read(dst_file) == self.payload
+
+        # the payload changed on the server
+        RangeRequestHandler.files["/changed.txt"] = b"version 1"
+        changed_file = os.path.join(self.temp_dir, "changed.txt")
+        FileUtils.download_file(f"{self.base_url}/changed.txt", changed_file, cache_dir=cache_dir)
+        RangeRequestHandler.files["/changed.txt"] = b"version 2"
+        FileUtils.download_file(f"{self.base_url}/changed.txt", changed_file, cache_dir=cache_dir)
+        assert RangeRequestHandler.statuses[-1] == 200
+        assert self._read(changed_file) == b"version 2"
+
+    def test_download_file_content_addressed_bodies(self):
+        # Test bodies are stored once per content and restore deleted local files on 304
+        RangeRequestHandler.validators = True
+        RangeRequestHandler.files["/mirror/artifact.bin"] = self.payload
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        first = os.path.join(self.temp_dir, "first.bin")
+        second = os.path.join(self.temp_dir, "second.bin")
+
+        FileUtils.download_file(f"{self.base_url}/artifact.bin", first, cache_dir=cache_dir, cache_bodies=True)
+        FileUtils.download_file(f"{self.base_url}/mirror/artifact.bin", second, cache_dir=cache_dir, cache_bodies=True)
+        objects = os.listdir(os.path.join(cache_dir, "objects"))
+        assert objects == [hashlib.sha256(self.payload).hexdigest()]
+
+        os.remove(first)
+        FileUtils.download_file(f"{self.base_url}/artifact.bin", first, cache_dir=cache_dir, cache_bodies=True)
+        assert RangeRequestHandler.statuses[-1] == 304
+        assert self._read(first) == self.payload
+
+    def test_download_file_cache_without_validators(self):
+        # Test responses without ETag or Last-Modified are never cached
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        dst_file = os.path.join(self.temp_dir, "small.txt")
+        FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, cache_dir=cache_dir)
+        FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, cache_dir=cache_dir, segments=2)
+        assert RangeRequestHandler.statuses == [200, 200, 206, 206]
+        assert not os.path.exists(cache_dir)
+
+    def test_download_file_retry_resumes(self):
+        # Test a dropped transfer is retried from the last byte written
+        RangeRequestHandler.validators = True
+        RangeRequestHandler.drops = {"/artifact.bin": 2}
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+
+        url = f"{self.base_url}/artifact.bin"
+        assert FileUtils.download_file(url, dst_file, chunk_size=16 * 1024, retries=3, backoff=0.01) is True
+        assert self._read(dst_file) == self.payload
+        ranges = [r for m, p, r in RangeRequestHandler.requests_seen]
+        assert len(ranges) == 3
+        assert ranges[0] is None
+        assert RangeRequestHandler.statuses == [200, 206, 206]
+
+    def test_download_file_retry_server_errors(self):
+        # Test 5xx responses are retried and exhausted retries raise
+        RangeRequestHandler.errors = {"/small.txt": 2}
+        dst_file = os.path.join(self.temp_dir, "small.txt")
+        assert FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, retries=2, backoff=0.01) is True
+        assert self._read(dst_file) == b"small"
+
+        RangeRequestHandler.errors = {"/small.txt": 5}
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/small.txt", dst_file, retries=1, backoff=0.01)
+
+        # client errors are never retried
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/missing.bin", dst_file, retries=3, backoff=0.01)
+        assert RangeRequestHandler.statuses.count(404) == 1
+
+    def test_download_file_segmented_retry(self):
+        # Test a dropped segment is resumed on its own
+        RangeRequestHandler.drops = {"/artifact.bin": 1}
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, segments=4, retries=2, backoff=0.01)
+        assert self._read(dst_file) == self.payload
+        assert len([m for m, p, r in RangeRequestHandler.requests_seen if m == "GET"]) == 5
+
+    def test_download_file_segmented_failure(self):
+        # Test a failed segmented download leaves nothing a later resume could trust
+        RangeRequestHandler.errors = {"/artifact.bin": 1}
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        with pytest.raises(requests.HTTPError):
+            FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, segments=4)
+        assert not os.path.exists(dst_file)
+        assert not os.path.exists(f"{dst_file}.part")
+
+        assert FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, resume=True) is True
+        assert self._read(dst_file) == self.payload
+
+    def test_download_file_rate_limit(self):
+        # Test the token bucket caps the transfer rate per call and across calls
+        dst_file = os.path.join(self.temp_dir, "artifact.bin")
+        start = time.perf_counter()
+        FileUtils.download_file(f"{self.base_url}/artifact.bin", dst_file, chunk_size=16 * 1024, rate_limit=128 * 1024)
+        assert time.perf_counter() - start >= 0.4
+        assert self._read(dst_file) == self.payload
+
+        limiter = RateLimiter(1024 * 1024, burst=16 * 1024)
+        downloads = [(f"{self.base_url}/artifact.bin", os.path.join(self.temp_dir, f"copy_{i}.bin")) for i in range(2)]
+        start = time.perf_counter()
+        results = FileUtils.download_many(downloads, chunk_size=16 * 1024, rate_limit=limiter)
+        assert time.perf_counter() - start >= 0.3
+        assert all(r.error is None for r in results)
+
+    def test_rate_limiter(self):
+        # Test the token bucket allows bursts and rejects invalid rates
+        with pytest.raises(ValueError):
+            RateLimiter(0)
+        limiter = RateLimiter(1000, burst=1000)
+        start = time.perf_counter()
+        limiter.consume(1000)
+        assert time.perf_counter() - start < 0.1
+        limiter.consume(100)
+        assert time.perf_counter() - start >= 0.09
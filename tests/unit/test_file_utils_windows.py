@@ -31,8 +31,9 @@ class TestFileUtilsWindows:
         temp_dir = tempfile.mkdtemp(prefix="test_unzip_")
         try:
             result = FileUtils.unzip(self.test_zip_file, temp_dir)
-            assert result is not None
-            test_file = os.path.join(temp_dir, result.filelist[0].filename)
+            assert len(result) == 1
+            test_file = os.path.join(temp_dir, "test_zip_file")
+            assert result[0].path == Path(test_file)
             files_list = FileUtils.list_files(temp_dir)
             assert Path(test_file) in files_list
         finally: